@@ -0,0 +1,81 @@
+"""
+Budget chart rendering: DataFrame + plotly.express vs cached graph_objects figure
+
+Usage:
+    python -m benchmarks.bench_chart [--repeat 200]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from utils import budget_utils
+
+COLD_LEGACY = ("import pandas as pd, plotly.express as px; "
+               "px.pie(pd.DataFrame({'Category': ['a', 'b'], 'Cost': [1, 2]}), values='Cost', names='Category')")
+COLD_FAST = "import plotly.graph_objects as go; go.Figure(go.Pie(labels=['a', 'b'], values=[1, 2]))"
+
+
+def legacy_figure(budget_info):
+    """The DataFrame + px.pie build generate_budget_visualization used to run on every rerun."""
+    import pandas as pd
+    import plotly.express as px
+
+    df = pd.DataFrame.from_dict(budget_info['cost_breakdown'], orient='index', columns=['Cost'])
+    df.index.name = 'Category'
+    df = df.reset_index()
+    fig = px.pie(df, values='Cost', names='Category',
+                 title='Travel Budget Breakdown',
+                 color_discrete_sequence=px.colors.sequential.Plasma_r)
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
+
+
+def cold_ms(code, runs=3):
+    """Median wall time of running code in a fresh interpreter, minus interpreter startup."""
+    def run(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        return time.perf_counter() - start
+
+    baseline = statistics.median(run("pass") for _ in range(runs))
+    return (statistics.median(run(code) for _ in range(runs)) - baseline) * 1000
+
+
+def per_call_ms(fn, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    # plotly loads submodules lazily, so time the first figure rather than the bare import
+    print("first figure in a fresh process")
+    print(f"  px.pie + DataFrame     {cold_ms(COLD_LEGACY):8.1f} ms")
+    print(f"  graph_objects          {cold_ms(COLD_FAST):8.1f} ms")
+
+    def breakdown(i):
+        # Distinct values per call defeat the figure cache
+        return {'cost_breakdown': {'accommodation': 500.0 + i, 'food': 250.0, 'local_transport': 100.0,
+                                   'attractions': 150.0, 'miscellaneous': 50.0}}
+
+    fixed = breakdown(0)
+    legacy_figure(fixed)
+    budget_utils.generate_budget_visualization(fixed)
+
+    print("figure build")
+    print(f"  px.pie + DataFrame     {per_call_ms(lambda i: legacy_figure(breakdown(i)), args.repeat):8.3f} ms")
+    print(f"  graph_objects          "
+          f"{per_call_ms(lambda i: budget_utils.generate_budget_visualization(breakdown(i + 1)), args.repeat):8.3f} ms")
+    print(f"  cached (same inputs)   "
+          f"{per_call_ms(lambda i: budget_utils.generate_budget_visualization(fixed), args.repeat):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
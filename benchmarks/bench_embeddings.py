@@ -0,0 +1,175 @@
+"""
+Embedding backends: encode throughput, query latency, RSS and retrieval recall@k
+
+Each backend runs in a fresh process, so peak RSS and load time are its own.
+Every backend embeds the same generated corpus of travel chat exchanges and
+queries; recall@k is the overlap of its top-k exchanges per query with those
+of the float32 PyTorch model, also after rounding the vectors to float16 as
+EMBEDDING_STORAGE_DTYPE=float16 stores them.
+
+Usage:
+    python -m benchmarks.bench_embeddings [--backends torch,torch-int8,onnx,onnx-int8] [--corpus 2000]
+        [--queries 200] [--k 3,10]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from services import model_registry
+
+REFERENCE_BACKEND = "torch"
+CITIES = ("Paris", "Tokyo", "Rome", "Lisbon", "Barcelona", "Bangkok", "New York", "Cape Town", "Sydney",
+          "Istanbul", "Prague", "Mexico City", "Reykjavik", "Marrakech", "Hanoi", "Vienna", "Buenos Aires")
+TOPICS = ("street food", "museums", "hiking trails", "nightlife", "budget hotels", "family activities",
+          "public transport", "beaches", "local markets", "day trips", "vegetarian restaurants", "weather")
+QUESTIONS = (
+    "What are the best {topic} in {city}?",
+    "Is {city} good for {topic} in {month}?",
+    "How much should I budget for {topic} in {city}?",
+    "Can you plan two days around {topic} in {city}?",
+    "Any tips on {topic} near the centre of {city}?",
+)
+ANSWERS = (
+    "For {topic} in {city}, start early and book ahead in {month}.",
+    "{city} has plenty of {topic}; the old town is a good base.",
+    "Expect moderate prices for {topic} in {city}, cheaper outside {month}.",
+    "I would pair {topic} with a walking tour on your first day in {city}.",
+)
+MONTHS = ("January", "April", "June", "August", "October", "December")
+
+
+def build_corpus(size, queries, seed=13):
+    """Return (exchanges, queries) generated deterministically from the templates."""
+    rng = random.Random(seed)
+
+    def fill(template):
+        return template.format(city=rng.choice(CITIES), topic=rng.choice(TOPICS), month=rng.choice(MONTHS))
+
+    exchanges = [f"User: {fill(rng.choice(QUESTIONS))}\nAI: {fill(rng.choice(ANSWERS))}" for _ in range(size)]
+    return exchanges, [fill(rng.choice(QUESTIONS)) for _ in range(queries)]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(backend, corpus_size, query_count, output_dir):
+    """Load one backend, embed the corpus and queries, save the vectors and print its timings as JSON."""
+    exchanges, queries = build_corpus(corpus_size, query_count)
+    rss_before = peak_rss_mb()
+
+    start = time.perf_counter()
+    model = model_registry.get_sentence_transformer(model_registry.DEFAULT_EMBEDDING_MODEL, backend)
+    load_seconds = time.perf_counter() - start
+    model.encode(exchanges[:32])  # warm-up, not measured
+
+    start = time.perf_counter()
+    corpus_vectors = model.encode(exchanges, batch_size=32, convert_to_numpy=True)
+    encode_seconds = time.perf_counter() - start
+
+    # Queries are embedded one at a time, as ConversationMemory does
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(model.encode(query, convert_to_numpy=True))
+        latencies.append(time.perf_counter() - start)
+
+    np.save(os.path.join(output_dir, f"{backend}-corpus.npy"), np.asarray(corpus_vectors, dtype=np.float32))
+    np.save(os.path.join(output_dir, f"{backend}-queries.npy"), np.asarray(query_vectors, dtype=np.float32))
+    latencies.sort()
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "docs_per_second": len(exchanges) / encode_seconds,
+        "query_p50_ms": latencies[len(latencies) // 2] * 1000,
+        "query_p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "model_rss_mb": peak_rss_mb() - rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def top_k(corpus, queries, k):
+    corpus = corpus / np.maximum(np.linalg.norm(corpus, axis=1, keepdims=True), 1e-12)
+    queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    scores = queries @ corpus.T
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+
+def recall_at_k(reference, candidate, k):
+    """Mean fraction of the reference top-k that the candidate also ranks in its top-k."""
+    hits = [len(set(ref) & set(cand)) for ref, cand in zip(reference, candidate)]
+    return sum(hits) / (k * len(hits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=",".join(model_registry.EMBEDDING_BACKENDS),
+                        help="comma-separated backends; the float32 torch backend is always the reference")
+    parser.add_argument("--corpus", type=int, default=2000, help="stored exchanges")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", default="3,10", help="comma-separated recall cut-offs")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.corpus, args.queries, args.output_dir)
+        return
+
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    if REFERENCE_BACKEND not in backends:
+        backends.insert(0, REFERENCE_BACKEND)
+    cutoffs = [int(k) for k in args.k.split(",")]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        results = {}
+        for backend in backends:
+            print(f"running {backend}...", file=sys.stderr)
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_embeddings", "--worker", backend,
+                 "--corpus", str(args.corpus), "--queries", str(args.queries), "--output-dir", output_dir],
+                capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                print(f"{backend} failed:\n{completed.stderr.strip().splitlines()[-1]}", file=sys.stderr)
+                continue
+            results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        if REFERENCE_BACKEND not in results:
+            sys.exit("the reference torch backend failed; recall cannot be computed")
+
+        def vectors(backend):
+            return (np.load(os.path.join(output_dir, f"{backend}-corpus.npy")),
+                    np.load(os.path.join(output_dir, f"{backend}-queries.npy")))
+
+        reference = {k: top_k(*vectors(REFERENCE_BACKEND), k) for k in cutoffs}
+        for backend, result in results.items():
+            corpus, queries = vectors(backend)
+            half_corpus, half_queries = (corpus.astype(np.float16).astype(np.float32),
+                                         queries.astype(np.float16).astype(np.float32))
+            for k in cutoffs:
+                result[f"recall@{k}"] = recall_at_k(reference[k], top_k(corpus, queries, k), k)
+                result[f"recall@{k}_float16"] = recall_at_k(reference[k], top_k(half_corpus, half_queries, k), k)
+
+    header = f"{'backend':<11} {'load s':>7} {'docs/s':>8} {'query p50':>10} {'model MB':>9}"
+    header += "".join(f" {f'r@{k}':>6} {f'r@{k} f16':>9}" for k in cutoffs)
+    print(header)
+    for backend, result in results.items():
+        line = (f"{backend:<11} {result['load_seconds']:7.2f} {result['docs_per_second']:8.0f} "
+                f"{result['query_p50_ms']:8.2f}ms {result['model_rss_mb']:9.0f}")
+        line += "".join(f" {result[f'recall@{k}']:6.3f} {result[f'recall@{k}_float16']:9.3f}" for k in cutoffs)
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Intent matching throughput: per-keyword substring scan vs the compiled IntentMatcher
+
+Usage:
+    python -m benchmarks.bench_intents [--messages 200000]
+"""
+import argparse
+import random
+import time
+
+from services.intent_matcher import IntentMatcher, DEFAULT_VOCABULARY
+from services.nlp_services import INTENT_VOCABULARY_PATH, load_intent_matcher
+
+WORDS = (
+    "i want to plan a trip to paris in june with my family what does a week in tokyo cost "
+    "can you recommend good restaurants near the colosseum the hotel was terrible and rude "
+    "that itinerary was amazing thank you is it safe to travel in august suggest a relaxing "
+    "destination how much money should i bring for food planet baden museum beach"
+).split()
+
+
+def legacy_match(text):
+    """The substring scan analyze_conversation_intent used to run per call."""
+    intent_keywords = {intent: list(keywords) for intent, keywords in DEFAULT_VOCABULARY.items()}
+    text_lower = text.lower()
+    detected_intents = []
+    for intent, keywords in intent_keywords.items():
+        matched_keywords = [kw for kw in keywords if kw in text_lower]
+        if matched_keywords:
+            detected_intents.append({"intent": intent, "keywords_matched": matched_keywords})
+    return detected_intents
+
+
+# Inflected and derived forms the legacy scan and the stemmed matcher disagree on
+RECALL_CASES = (
+    "Any recommendations for Rome?",
+    "Suggestions for traveling in Japan?",
+    "We are budgeting for a family trip",
+    "Is the museum expensive?",
+    "The planet looks amazing from up here",
+)
+
+
+def throughput(fn, messages):
+    start = time.perf_counter()
+    for message in messages:
+        fn(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200000, help="number of synthetic messages")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    messages = [" ".join(rng.choices(WORDS, k=rng.randint(5, 30))) for _ in range(args.messages)]
+
+    start = time.perf_counter()
+    matcher = load_intent_matcher(INTENT_VOCABULARY_PATH)
+    print(f"matcher compile time      {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    print(f"legacy substring scan     {throughput(legacy_match, messages):10.0f} msg/s")
+    print(f"compiled matcher (config) {throughput(lambda m: matcher.match(m.lower()), messages):10.0f} msg/s")
+
+    for text in RECALL_CASES:
+        legacy = [d["intent"] for d in legacy_match(text)]
+        compiled = [d["intent"] for d in matcher.match(text.lower())]
+        print(f"  {text:<40} legacy {legacy}  compiled {compiled}")
+
+    # Grow the vocabulary to see how each approach scales with keyword count
+    for size in (100, 1000, 10000):
+        vocabulary = {f"intent_{i % 20}": {} for i in range(20)}
+        for i in range(size):
+            vocabulary[f"intent_{i % 20}"][f"keyword{i}"] = 1.0
+        vocabulary["intent_0"].update(DEFAULT_VOCABULARY["travel_planning"])
+        large = IntentMatcher(vocabulary)
+        keywords = [kw for kws in vocabulary.values() for kw in kws]
+        sample = messages[:max(1000, len(messages) // 20)]
+
+        def substring_scan(text, keywords=keywords):
+            text_lower = text.lower()
+            return [kw for kw in keywords if kw in text_lower]
+
+        print(f"{size:>6} keywords: substring {throughput(substring_scan, sample):10.0f} msg/s   "
+              f"compiled {throughput(lambda m: large.match(m.lower()), sample):10.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Language identification accuracy and latency on the bundled multilingual test set
+
+Reports per-language accuracy and the misclassified sentences, then the
+per-message latency of LanguageIdentifier.detect and detect_batch.
+
+Usage:
+    python -m benchmarks.bench_langid [--test-set data/langid/test.tsv] [--repeat 200]
+"""
+import argparse
+import time
+from collections import Counter
+
+from services.langid import LANGUAGE_PROFILES_PATH, LanguageIdentifier
+
+TEST_SET_PATH = "data/langid/test.tsv"
+
+
+def read_test_set(path):
+    """Read (language, sentence) pairs from a tab-separated file."""
+    with open(path, encoding="utf-8") as f:
+        return [tuple(line.rstrip("\n").split("\t", 1)) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--test-set", default=TEST_SET_PATH)
+    parser.add_argument("--model", default=LANGUAGE_PROFILES_PATH)
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the test set for the latency runs")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    identifier = LanguageIdentifier.from_file(args.model)
+    load_ms = (time.perf_counter() - start) * 1000
+    samples = read_test_set(args.test_set)
+    texts = [text for _, text in samples]
+
+    predictions = identifier.detect_batch(texts)
+    totals, correct = Counter(), Counter()
+    errors = []
+    for (language, text), (predicted, confidence) in zip(samples, predictions):
+        totals[language] += 1
+        if predicted == language:
+            correct[language] += 1
+        else:
+            errors.append((language, predicted, confidence, text))
+
+    print(f"model: {len(identifier.languages)} languages, loaded in {load_ms:.1f} ms")
+    print(f"{'language':<10}{'sentences':>10}{'accuracy':>10}")
+    for language in sorted(totals):
+        print(f"{language:<10}{totals[language]:>10}{correct[language] / totals[language]:>10.1%}")
+    print(f"{'all':<10}{len(samples):>10}{sum(correct.values()) / len(samples):>10.1%}")
+    for language, predicted, confidence, text in errors:
+        print(f"  {language} -> {predicted} ({confidence:.2f}): {text}")
+
+    messages = texts * args.repeat
+    start = time.perf_counter()
+    for text in messages:
+        identifier.detect(text)
+    single_us = (time.perf_counter() - start) / len(messages) * 1e6
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        identifier.detect_batch(texts)
+    batch_us = (time.perf_counter() - start) / len(messages) * 1e6
+    print(f"\nmean message length: {sum(map(len, texts)) / len(texts):.0f} chars")
+    print(f"detect:       {single_us:8.1f} us/message")
+    print(f"detect_batch: {batch_us:8.1f} us/message ({len(texts)} per batch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Per-session memory queries: shared Chroma collection vs in-process VectorIndex
+
+Mirrors the two ConversationMemory query paths without the embedding model:
+every session stores --history random unit vectors, either in one Chroma
+collection filtered by session_id (CONVERSATION_MEMORY_INDEX=chroma) or in
+one VectorIndex per session (local). Each path and session count runs in a
+fresh process, so the resident memory it reports is its own.
+
+Usage:
+    python -m benchmarks.bench_memory_index [--sessions 1,100,10000] [--history 50] [--queries 500]
+        [--dtype float32]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+DIM = 384
+PATHS = ("chroma", "local")
+
+
+def resident_bytes():
+    # Current (not peak) resident set size, Linux only
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def unit_vectors(rng, count):
+    vectors = rng.standard_normal((count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_chroma(sessions, history, rng):
+    import chromadb
+
+    client = chromadb.Client()
+    collection = client.get_or_create_collection(name="bench_memory_index")
+    batch = client.get_max_batch_size()
+    ids, embeddings, metadatas = [], [], []
+
+    def flush():
+        collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas)
+        ids.clear(), embeddings.clear(), metadatas.clear()
+
+    for session in range(sessions):
+        for i, vector in enumerate(unit_vectors(rng, history)):
+            ids.append(f"{session}-{i}")
+            embeddings.append(vector.tolist())
+            metadatas.append({"session_id": str(session)})
+            if len(ids) >= batch:
+                flush()
+    if ids:
+        flush()
+
+    def query(session, vector, top_k):
+        return collection.query(query_embeddings=[vector.tolist()], n_results=min(top_k, history),
+                                where={"session_id": str(session)}, include=["metadatas", "distances"])
+    return query
+
+
+def build_local(sessions, history, rng, dtype):
+    from services.vector_index import VectorIndex
+
+    indexes = []
+    for session in range(sessions):
+        index = VectorIndex(history, dtype)
+        for i, vector in enumerate(unit_vectors(rng, history)):
+            index.add(f"{session}-{i}", vector)
+        indexes.append(index)
+
+    def query(session, vector, top_k):
+        return indexes[session].search(vector, top_k)
+    return query
+
+
+def run_worker(path, sessions, history, queries, dtype):
+    rng = np.random.default_rng(11)
+    # Import the store before measuring, so only the stored sessions count
+    import chromadb  # noqa: F401
+    from services import vector_index  # noqa: F401
+
+    before = resident_bytes()
+    start = time.perf_counter()
+    query = build_chroma(sessions, history, rng) if path == "chroma" else build_local(sessions, history, rng, dtype)
+    build_seconds = time.perf_counter() - start
+    stored_bytes = resident_bytes() - before
+
+    targets = rng.integers(0, sessions, size=queries)
+    vectors = unit_vectors(rng, queries)
+    query(int(targets[0]), vectors[0], 3)  # warm-up, not measured
+    latencies = []
+    for session, vector in zip(targets, vectors):
+        start = time.perf_counter()
+        query(int(session), vector, 3)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    print(json.dumps({
+        "path": path,
+        "sessions": sessions,
+        "build_seconds": build_seconds,
+        "query_p50_us": latencies[len(latencies) // 2] * 1e6,
+        "query_p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6,
+        "resident_mb": stored_bytes / 2 ** 20,
+        "kb_per_session": stored_bytes / sessions / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="1,100,10000", help="comma-separated session counts")
+    parser.add_argument("--history", type=int, default=50, help="stored exchanges per session (max_history)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dtype", default="float32", help="VectorIndex storage dtype: float32 or float16")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-sessions", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.worker_sessions, args.history, args.queries, args.dtype)
+        return
+
+    print(f"{'path':<7} {'sessions':>8} {'build s':>8} {'p50 us':>9} {'p99 us':>9} {'RSS MB':>8} {'KB/session':>11}")
+    for sessions in (int(count) for count in args.sessions.split(",")):
+        for path in PATHS:
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_memory_index", "--worker", path,
+                 "--worker-sessions", str(sessions), "--history", str(args.history),
+                 "--queries", str(args.queries), "--dtype", args.dtype],
+                capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                print(f"{path} with {sessions} sessions failed:\n{completed.stderr.strip()}", file=sys.stderr)
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            print(f"{path:<7} {sessions:>8} {result['build_seconds']:8.2f} {result['query_p50_us']:9.1f} "
+                  f"{result['query_p99_us']:9.1f} {result['resident_mb']:8.1f} {result['kb_per_session']:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
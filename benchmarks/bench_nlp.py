@@ -0,0 +1,74 @@
+"""
+Per-message latency of the chatbot NLP stage, before and after NLPService.analyze
+
+Usage:
+    python -m benchmarks.bench_nlp [--messages 500]
+"""
+import argparse
+import statistics
+import time
+
+from services import model_registry
+from services.nlp_services import NLPService
+
+SAMPLE_MESSAGES = [
+    "I want to plan a trip to Paris in June with my family",
+    "What does a week in Tokyo cost on a budget of $2000?",
+    "Can you recommend some good restaurants near the Colosseum in Rome?",
+    "The hotel in Barcelona was terrible and the staff were rude",
+    "That itinerary for Lisbon was amazing, thank you!",
+    "Is it safe to travel to Cairo in August?",
+    "Suggest a relaxing destination in Southeast Asia for two weeks",
+    "How much money should I bring for food in New York City?",
+]
+
+
+def legacy_pass(service, message):
+    """The three separate calls chatbot_page used to make per message."""
+    service.analyze_sentiment(message)
+    service.analyze_conversation_intent(message)
+    service.extract_key_entities(message)
+
+
+def single_pass(service, message):
+    service.analyze(message)
+
+
+def measure(fn, service, messages):
+    timings = []
+    for message in messages:
+        start = time.perf_counter()
+        fn(service, message)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28} mean {statistics.mean(timings) * 1000:7.2f} ms   "
+          f"p50 {statistics.median(timings) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500, help="number of messages to analyze")
+    args = parser.parse_args()
+
+    messages = [SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)] for i in range(args.messages)]
+
+    # The legacy path ran the full spaCy pipeline, parser and lemmatizer included
+    legacy = NLPService()
+    legacy.nlp = model_registry.get_spacy_model(model_registry.DEFAULT_SPACY_MODEL)
+    current = NLPService()
+
+    # Warm up both pipelines before timing
+    measure(legacy_pass, legacy, messages[:20])
+    measure(single_pass, current, messages[:20])
+
+    report("before (3 calls, full spaCy)", measure(legacy_pass, legacy, messages))
+    report("after (NLPService.analyze)", measure(single_pass, current, messages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+NLP throughput under concurrent sessions: in-thread analysis vs the worker pool
+
+Each session thread sends single-message requests, as chat turns do. The
+inline run uses the shared NLPService and SentenceTransformer in the
+calling threads; pool runs go through an NLPWorkerPool of each size.
+
+Usage:
+    python -m benchmarks.bench_nlp_pool [--workers 1,2,4] [--sessions 16] [--requests 400]
+        [--tasks analyze,embed] [--spacy-model en_core_web_sm]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_suite import CHAT_MESSAGES, percentile
+from services import model_registry
+from services.nlp_pool import NLPWorkerPool
+
+TASKS = ("analyze", "embed")
+
+
+def run(request, sessions, requests):
+    def timed(i):
+        start = time.perf_counter()
+        request(f"{CHAT_MESSAGES[i % len(CHAT_MESSAGES)]} ({i})")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        latencies = sorted(pool.map(timed, range(requests)))
+    wall = time.perf_counter() - start
+    return requests / wall, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000
+
+
+def inline_requests(spacy_model):
+    from services.nlp_services import NLPService
+
+    return {
+        "analyze": NLPService(spacy_model).analyze,
+        "embed": lambda text: model_registry.get_sentence_transformer().encode([text]),
+    }
+
+
+def pool_requests(pool):
+    return {"analyze": pool.analyze, "embed": lambda text: pool.embed([text])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated pool sizes")
+    parser.add_argument("--sessions", type=int, default=16, help="concurrent requesting threads")
+    parser.add_argument("--requests", type=int, default=400, help="measured requests per run")
+    parser.add_argument("--tasks", default=",".join(TASKS), help="comma-separated: analyze, embed")
+    parser.add_argument("--spacy-model", default=model_registry.DEFAULT_SPACY_MODEL,
+                        help="spaCy package name or pipeline directory")
+    args = parser.parse_args()
+    tasks = [task.strip() for task in args.tasks.split(",") if task.strip()]
+
+    runs = [("inline", None)] + [(f"pool x{count}", int(count)) for count in args.workers.split(",")]
+    print(f"{'mode':<9} {'task':<8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, workers in runs:
+        pool = NLPWorkerPool(workers=workers, spacy_model=args.spacy_model) if workers else None
+        requests = pool_requests(pool) if pool else inline_requests(args.spacy_model)
+        try:
+            for task in tasks:
+                requests[task](CHAT_MESSAGES[0])  # warm-up: models, lazy imports, worker start
+                throughput, p50, p99 = run(requests[task], args.sessions, args.requests)
+                print(f"{label:<9} {task:<8} {throughput:8.1f} {p50:8.2f} {p99:8.2f}")
+        finally:
+            if pool is not None:
+                pool.close()
+
+
+if __name__ == "__main__":
+    main()
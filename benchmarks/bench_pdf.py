@@ -0,0 +1,77 @@
+"""
+PDF export: per-call font loading and file round trip vs the cached in-memory renderer
+
+Usage:
+    python -m benchmarks.bench_pdf [--days 14] [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from fpdf import FPDF
+
+from utils import pdf_generator
+
+DAY_TEMPLATE = (
+    "Day {day}: Morning walk through the old town and a café breakfast. "
+    "Afternoon at the museum quarter, then a river cruise at sunset. "
+    "Dinner: local specialities near the main square (budget ~45 €).\n\n"
+)
+
+
+def legacy_pdf(travel_plan, destination, directory):
+    """The original generate_pdf: add_font on every call, write to disk, read back."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.add_font("DejaVuSans", "", pdf_generator.FONT_PATH, uni=True)
+    pdf.set_font("DejaVuSans", size=12)
+    pdf.cell(200, 10, txt=f"Travel Plan for {destination}", ln=True, align="C")
+    pdf.ln(10)
+    pdf.multi_cell(0, 10, travel_plan)
+    path = os.path.join(directory, f"{destination}_travel_plan.pdf")
+    pdf.output(path)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def measure(fn, runs):
+    """Return (median ms, peak traced KiB) over runs calls, after one untimed warm-up call."""
+    fn()
+    timings, peak = [], 0
+    for _ in range(runs):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(timings), peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=14, help="days in the synthetic plan")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    plan = "".join(DAY_TEMPLATE.format(day=day) for day in range(1, args.days + 1))
+    counter = iter(range(10 ** 9))
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = [
+            ("legacy (font + file per call)", lambda: legacy_pdf(plan, "Lisbon", directory)),
+            # A unique suffix per call defeats the content cache, leaving only font reuse
+            ("in-memory, font cached", lambda: pdf_generator.generate_pdf_bytes(f"{plan}{next(counter)}", "Lisbon")),
+            ("in-memory, content cache hit", lambda: pdf_generator.generate_pdf_bytes(plan, "Lisbon")),
+        ]
+        print(f"{args.days}-day plan, {len(plan)} characters, median of {args.runs} runs")
+        for name, fn in rows:
+            median_ms, peak_kib = measure(fn, args.runs)
+            print(f"{name:<32} {median_ms:9.2f} ms   peak {peak_kib:9.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+End-to-end benchmark suite against local fake providers
+
+Runs each scenario with a fixed number of requests at a given concurrency and
+reports throughput and p50/p95/p99 latency. Results are written as JSON;
+pass a previous file with --compare to see the change per scenario.
+
+Scenarios:
+    planner          destination lookups + plan generation (plan_trip), unique destinations
+    planner_stream   the same with the streamed plan consumed to the end
+    chat             chat turns (analysis, context retrieval, completion, memory write)
+    nlp              NLPService.analyze on a chat message
+    memory_insert    ConversationMemory.add_conversation (only the enqueue when write-behind is on)
+    memory_retrieve  ConversationMemory.retrieve_relevant_memories
+    pdf              uncached PDF rendering of a plan
+
+Usage:
+    python -m benchmarks.bench_suite [--scenarios planner,chat] [--requests 40] [--concurrency 4]
+        [--latency llm=400:0.3] [--error-rate weather=0.05] [--fake-models]
+        [--output results.json] [--compare previous.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from benchmarks import fake_providers
+
+CHAT_MESSAGES = [
+    "I want to plan a trip to Paris in June with my family",
+    "What does a week in Tokyo cost on a budget of $2000?",
+    "Can you recommend some good restaurants near the Colosseum in Rome?",
+    "The hotel in Barcelona was terrible and the staff were rude",
+    "That itinerary for Lisbon was amazing, thank you!",
+    "Suggest a relaxing destination in Southeast Asia for two weeks",
+]
+INTERESTS = ["Culture", "Food"]
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class _HashEmbedder:
+    """Deterministic stand-in for SentenceTransformer: one seeded unit vector per text."""
+
+    dim = 384
+
+    def encode(self, sentences, normalize_embeddings=False, **kwargs):
+        import numpy as np
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.stack([
+            np.random.default_rng(int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little"))
+            .standard_normal(self.dim).astype(np.float32)
+            for text in texts
+        ]) if texts else np.empty((0, self.dim), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+
+def install_fake_models():
+    """Register a blank spaCy pipeline and a hash embedder so no model download is needed."""
+    import spacy
+    from services import model_registry
+
+    model_registry.get_model(
+        ("spacy", model_registry.DEFAULT_SPACY_MODEL, tuple(sorted(model_registry.NER_ONLY_DISABLE))),
+        lambda: spacy.blank("en"),
+    )
+    model_registry.get_model(model_registry.sentence_transformer_key(), _HashEmbedder)
+
+
+def build_scenarios(run_id):
+    """Return scenario name -> (setup, request) where request(i, state) raises or returns an error message."""
+    from services.chat_service import get_session_memory, chat_reply, get_nlp_service
+    from services.nlp_services import ConversationMemory
+    from services.planner_service import plan_trip, stream_travel_plan, can_plan
+    from services.api_services import fetch_destination_data
+    from utils.pdf_generator import generate_pdf_bytes
+
+    def planner(i, state):
+        # A unique destination per request defeats the response and plan caches
+        return plan_trip(f"Benchville {run_id}-{i}", 1500, INTERESTS)["error"]
+
+    def planner_stream(i, state):
+        destination = f"Streamtown {run_id}-{i}"
+        results, errors = fetch_destination_data(destination)
+        if not can_plan(results["weather"], results["attractions"]):
+            return "; ".join(errors.values()) or "missing destination data"
+        status = {}
+        for _ in stream_travel_plan(destination, 1500, INTERESTS, results["weather"], results["attractions"], status):
+            pass
+        return status["error"]
+
+    def chat(i, state):
+        memory = get_session_memory(f"bench-{run_id}-{i % 8}")
+        return chat_reply(memory, f"{CHAT_MESSAGES[i % len(CHAT_MESSAGES)]} ({i})")["error"]
+
+    def nlp(i, state):
+        state["nlp"].analyze(CHAT_MESSAGES[i % len(CHAT_MESSAGES)])
+
+    def memory_insert(i, state):
+        state["memory"].add_conversation(f"question {i} about {CHAT_MESSAGES[i % len(CHAT_MESSAGES)]}",
+                                         f"answer {i}")
+
+    def memory_retrieve(i, state):
+        state["memory"].retrieve_relevant_memories(CHAT_MESSAGES[i % len(CHAT_MESSAGES)])
+
+    def pdf(i, state):
+        generate_pdf_bytes(f"{state['plan']}\nVariant {run_id}-{i}", "Benchville")
+
+    def nlp_setup():
+        return {"nlp": get_nlp_service()}
+
+    def memory_setup():
+        return {"memory": ConversationMemory(max_history=10_000, session_id=f"bench-memory-{run_id}")}
+
+    def filled_memory_setup():
+        state = memory_setup()
+        for i in range(200):
+            memory_insert(i, state)
+        state["memory"].flush()
+        return state
+
+    def pdf_setup():
+        words = fake_providers.PLAN_WORDS
+        return {"plan": "\n\n".join(" ".join(words) for _ in range(14))}
+
+    no_setup = dict
+    return {
+        "planner": (no_setup, planner),
+        "planner_stream": (no_setup, planner_stream),
+        "chat": (no_setup, chat),
+        "nlp": (nlp_setup, nlp),
+        "memory_insert": (memory_setup, memory_insert),
+        "memory_retrieve": (filled_memory_setup, memory_retrieve),
+        "pdf": (pdf_setup, pdf),
+    }
+
+
+def run_scenario(setup, request, requests, concurrency):
+    state = setup()
+    request(-1, state)  # warm-up, not measured
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            error = request(i, state)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return time.perf_counter() - start, error
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in outcomes)
+    errors = [error for _, error in outcomes if error]
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:3],
+        "wall_seconds": wall,
+        "throughput_rps": requests / wall if wall else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+    for q in PERCENTILES:
+        result[f"p{q}_ms"] = percentile(latencies, q) * 1000
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, previous=None):
+    print(f"{'scenario':<16} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, result in results.items():
+        line = (f"{name:<16} {result['throughput_rps']:8.1f} {result['p50_ms']:9.1f} "
+                f"{result['p95_ms']:9.1f} {result['p99_ms']:9.1f} {result['errors']:7d}")
+        before = (previous or {}).get(name)
+        if before:
+            changes = [
+                f"{label} {(result[key] - before[key]) / before[key] * 100:+.0f}%"
+                for label, key in (("req/s", "throughput_rps"), ("p50", "p50_ms"), ("p99", "p99_ms"))
+                if before.get(key)
+            ]
+            line += "   vs previous: " + ", ".join(changes)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="planner,planner_stream,chat,nlp,memory_insert,memory_retrieve,pdf",
+                        help="comma-separated scenario names")
+    parser.add_argument("--requests", type=int, default=40, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--fake-models", action="store_true",
+                        help="use a blank spaCy pipeline and a hash embedder instead of downloaded models")
+    parser.add_argument("--output", help="JSON results path (default: bench_suite_<timestamp>.json)")
+    parser.add_argument("--compare", help="previous JSON results to compare against")
+    fake_providers.add_arguments(parser)
+    args = parser.parse_args()
+
+    # litellm's response models warn on every fake completion
+    warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
+
+    config = fake_providers.config_from_args(args)
+    with fake_providers.FakeProviders(config) as fakes:
+        # Provider URLs and the LLM endpoint are read at import time, so set them before importing services
+        os.environ.update(fakes.env())
+        if args.fake_models:
+            install_fake_models()
+
+        run_id = datetime.now(timezone.utc).strftime("%H%M%S")
+        scenarios = build_scenarios(run_id)
+        names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(scenarios))
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+        results = {}
+        for name in names:
+            setup, request = scenarios[name]
+            print(f"running {name}...", file=sys.stderr)
+            results[name] = run_scenario(setup, request, args.requests, args.concurrency)
+        provider_requests, provider_errors = dict(fakes.requests), dict(fakes.errors)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["scenarios"]
+    print_table(results, previous)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fake_models": args.fake_models,
+            "providers": {name: vars(profile) for name, profile in config.profiles.items()},
+            "token_interval_ms": config.token_interval_ms,
+            "completion_tokens": config.completion_tokens,
+            "seed": config.seed,
+            "provider_requests": provider_requests,
+            "provider_errors": provider_errors,
+        },
+        "scenarios": results,
+    }
+    output = args.output or f"bench_suite_{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
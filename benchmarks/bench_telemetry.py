@@ -0,0 +1,75 @@
+"""
+Instrumentation overhead: a bare call vs the same call as a span, enabled and disabled
+
+Also times a three-level nested trace, an instrumented generator and one
+Prometheus export after every span has been recorded.
+
+Usage:
+    python -m benchmarks.bench_telemetry [--calls 200000]
+"""
+import argparse
+import time
+
+from services import telemetry
+
+
+def work():
+    return None
+
+
+@telemetry.instrument("bench.call")
+def instrumented_work():
+    return None
+
+
+@telemetry.instrument("bench.nested")
+def nested_work():
+    with telemetry.span("bench.inner"):
+        with telemetry.span("bench.leaf"):
+            return None
+
+
+@telemetry.instrument("bench.generator")
+def instrumented_generator():
+    yield None
+
+
+def per_call_ns(fn, calls):
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter_ns() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    def exhaust():
+        for _ in instrumented_generator():
+            pass
+
+    cases = (
+        ("bare call", work),
+        ("instrumented call", instrumented_work),
+        ("nested trace (3 spans)", nested_work),
+        ("instrumented generator", exhaust),
+    )
+    for flag in (True, False):
+        telemetry.set_enabled(flag)
+        telemetry.reset()
+        print(f"telemetry {'enabled' if flag else 'disabled'}:")
+        for label, fn in cases:
+            print(f"  {label:<24} {per_call_ns(fn, args.calls):8.0f} ns/call")
+
+    telemetry.set_enabled(True)
+    for _, fn in cases:
+        fn()
+    start = time.perf_counter()
+    text = telemetry.prometheus_text()
+    print(f"prometheus export: {(time.perf_counter() - start) * 1000:.2f} ms, {len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Local stand-ins for Serper, Foursquare, OpenWeatherMap and the Groq chat API
+
+Each provider answers after a latency drawn from a log-normal distribution
+(given by its median and spread) and fails with a configurable probability.
+Draws come from one seeded generator, so a run is reproducible up to thread
+scheduling. The chat endpoint is OpenAI-compatible, blocking and streaming,
+and is reached through litellm with LLM_API_BASE.
+
+Usage:
+    python -m benchmarks.fake_providers [--port 8900] [--latency llm=400] [--error-rate weather=0.05]
+
+Prints the environment variables that point the app at the fakes.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PROVIDERS = ("weather", "attractions", "recommendations", "llm")
+ROUTES = {
+    "/openweather": "weather",
+    "/foursquare": "attractions",
+    "/serper": "recommendations",
+    "/v1/chat/completions": "llm",
+}
+
+PLAN_WORDS = (
+    "Day one: stroll the old town, coffee at a corner café, then the museum quarter. "
+    "Day two: market breakfast, river walk and a sunset viewpoint. Pack light layers."
+).split()
+
+
+@dataclass
+class ProviderProfile:
+    """
+    Behaviour of one fake provider
+
+    Args:
+        median_ms (float): Median response latency (time to first token for the LLM)
+        sigma (float): Log-normal spread; 0 gives a constant latency
+        error_rate (float): Probability of answering with error_status
+        error_status (int): HTTP status of injected failures
+    """
+    median_ms: float
+    sigma: float = 0.5
+    error_rate: float = 0.0
+    error_status: int = 503
+
+
+@dataclass
+class FakeConfig:
+    profiles: dict = field(default_factory=lambda: {
+        "weather": ProviderProfile(80),
+        "attractions": ProviderProfile(150),
+        "recommendations": ProviderProfile(250),
+        "llm": ProviderProfile(300),
+    })
+    # Streaming pace of the fake LLM after the first token
+    token_interval_ms: float = 5.0
+    completion_tokens: int = 120
+    seed: int = 7
+
+
+class FakeProviders:
+    """
+    Threaded HTTP server hosting every fake provider
+
+    Use as a context manager; env() returns the settings that route the app's
+    provider and LLM calls to it.
+    """
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or FakeConfig()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self.requests = {name: 0 for name in PROVIDERS}
+        self.errors = {name: 0 for name in PROVIDERS}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        return {
+            "OPENWEATHER_URL": f"{self.url}/openweather",
+            "FOURSQUARE_URL": f"{self.url}/foursquare",
+            "SERPER_URL": f"{self.url}/serper",
+            "LLM_API_BASE": f"{self.url}/v1",
+            "LLM_MODEL": "openai/fake-groq",
+            "OPENAI_API_KEY": "fake",
+            "OPENWEATHER_API_KEY": "fake",
+            "FOURSQUARE_API_KEY": "fake",
+            "SERPER_API_KEY": "fake",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-providers", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def draw(self, provider):
+        """Return (latency seconds, failed) for the next request to a provider."""
+        profile = self.config.profiles[provider]
+        with self._rng_lock:
+            self.requests[provider] += 1
+            latency = profile.median_ms / 1000 * math.exp(self._rng.gauss(0, profile.sigma))
+            failed = self._rng.random() < profile.error_rate
+            if failed:
+                self.errors[provider] += 1
+        return latency, failed
+
+    def _handler_class(self):
+        fakes = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _route(self):
+                url = urlparse(self.path)
+                provider = ROUTES.get(url.path)
+                if provider is None:
+                    self._send_json(404, {"error": "not found"})
+                    return None, None
+                latency, failed = fakes.draw(provider)
+                time.sleep(latency)
+                if failed:
+                    self._send_json(fakes.config.profiles[provider].error_status, {"error": "injected failure"})
+                    return None, None
+                return provider, parse_qs(url.query)
+
+            def do_GET(self):
+                provider, query = self._route()
+                if provider == "weather":
+                    self._send_json(200, {"weather": [{"description": "scattered clouds"}],
+                                          "main": {"temp": 21.5}, "name": query.get("q", [""])[0]})
+                elif provider == "attractions":
+                    near = query.get("near", ["the city"])[0]
+                    self._send_json(200, {"results": [{"name": f"{near} landmark {i}"} for i in range(10)]})
+                elif provider == "recommendations":
+                    topic = query.get("q", ["destination"])[0]
+                    self._send_json(200, {"organic": [
+                        {"title": f"{topic} {i}", "link": f"https://example.com/{i}", "snippet": "A travel guide."}
+                        for i in range(10)
+                    ]})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                provider, _ = self._route()
+                if provider != "llm":
+                    return
+                words = [PLAN_WORDS[i % len(PLAN_WORDS)] for i in range(fakes.config.completion_tokens)]
+                if body.get("stream"):
+                    self._stream(words)
+                else:
+                    time.sleep(fakes.config.token_interval_ms / 1000 * len(words))
+                    self._send_json(200, {
+                        "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": "fake-groq",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": " ".join(words)}}],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)},
+                    })
+
+            def _stream(self, words):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for i, word in enumerate(words):
+                    if i:
+                        time.sleep(fakes.config.token_interval_ms / 1000)
+                    chunk = {"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": "fake-groq",
+                             "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        return Handler
+
+
+def apply_overrides(config, latencies=(), error_rates=()):
+    """
+    Apply "provider=MEDIAN_MS[:SIGMA]" and "provider=RATE[:STATUS]" overrides to a config
+
+    Raises:
+        ValueError: On an unknown provider or a malformed value
+    """
+    for spec in latencies:
+        provider, _, value = spec.partition("=")
+        if provider not in config.profiles:
+            raise ValueError(f"Unknown provider {provider!r}, expected one of {', '.join(PROVIDERS)}")
+        median, _, sigma = value.partition(":")
+        config.profiles[provider].median_ms = float(median)
+        if sigma:
+            config.profiles[provider].sigma = float(sigma)
+    for spec in error_rates:
+        provider, _, value = spec.partition("=")
+        if provider not in config.profiles:
+            raise ValueError(f"Unknown provider {provider!r}, expected one of {', '.join(PROVIDERS)}")
+        rate, _, status = value.partition(":")
+        config.profiles[provider].error_rate = float(rate)
+        if status:
+            config.profiles[provider].error_status = int(status)
+    return config
+
+
+def add_arguments(parser):
+    parser.add_argument("--latency", action="append", default=[], metavar="PROVIDER=MEDIAN_MS[:SIGMA]",
+                        help=f"latency of a fake provider ({', '.join(PROVIDERS)}); repeatable")
+    parser.add_argument("--error-rate", action="append", default=[], metavar="PROVIDER=RATE[:STATUS]",
+                        help="probability of an injected HTTP error; repeatable")
+    parser.add_argument("--token-interval-ms", type=float, default=FakeConfig.token_interval_ms)
+    parser.add_argument("--completion-tokens", type=int, default=FakeConfig.completion_tokens)
+    parser.add_argument("--seed", type=int, default=FakeConfig.seed)
+
+
+def config_from_args(args):
+    config = FakeConfig(token_interval_ms=args.token_interval_ms, completion_tokens=args.completion_tokens,
+                        seed=args.seed)
+    return apply_overrides(config, args.latency, args.error_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with FakeProviders(config_from_args(args), args.host, args.port) as fakes:
+        for name, value in fakes.env().items():
+            print(f"export {name}={value}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,21 @@
 import streamlit as st
 import os
-from services.api_services import get_destination_recommendations, get_weather_info, get_attractions
-from utils.budget_utils import estimate_trip_budget, generate_budget_visualization
-from utils.pdf_generator import generate_pdf
+from services.api_services import iter_destination_data
+from utils.budget_utils import estimate_trip_budget, generate_budget_visualization, scenarios_within_budget
+from utils.pdf_generator import generate_pdf_bytes
 from utils.ui_utils import apply_apple_style_ui
-from litellm import completion
-from services.nlp_services import ConversationMemory, NLPService
-from pages.chatbot_page import chatbot_page
+from utils.session_utils import get_conversation_memory, conversation_memory_ready
+from services.llm_services import load_litellm, LLM_STREAMING
+from services.nlp_services import CONVERSATION_MEMORY_DIR
+from services.nlp_pool import get_nlp_pool, NLP_WORKERS
+from services import model_registry, telemetry
+from services.planner_service import (generate_travel_plan, stream_travel_plan, can_plan,
+                                      PLAN_DAYS, MISSING_DATA_MESSAGE)
 from dotenv import load_dotenv
 
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+
 def display_recommendations(recommendations):
     if recommendations:
         for rec in recommendations:
@@ -21,6 +26,32 @@ def display_recommendations(recommendations):
     else:
         st.write("No specific travel recommendations found.")
 
+def display_weather(weather_data):
+    if weather_data:
+        weather_description = weather_data['weather'][0]['description']
+        temperature = weather_data['main']['temp']
+        st.markdown(f"**{weather_description}** - {temperature}°C")
+    else:
+        st.write("Weather data not available.")
+
+def display_attractions(attractions):
+    if attractions:
+        for attraction in attractions:
+            st.markdown(f"- {attraction.get('name', 'Unnamed Attraction')}")
+    else:
+        st.write("No attractions data available.")
+
+def display_budget_options(budget, destination):
+    fits = scenarios_within_budget(budget, [destination])
+    if fits.empty:
+        st.sidebar.write(f"Even a one-day budget trip costs more than ${budget:,.0f}.")
+        return
+    # Longest affordable trip for each comfort tier
+    longest = fits.drop_duplicates('tier')
+    for scenario in longest.sort_values('tier').itertuples():
+        st.sidebar.write(f"- **{scenario.tier.title()}**: up to {scenario.duration} days "
+                         f"(${scenario.total_estimated_budget:,.0f})")
+
 def travel_planner_page():
 
     # Apply Apple-style UI
@@ -35,111 +66,97 @@ def travel_planner_page():
         ["Culture", "Food", "Adventure", "Nature", "History", "Nightlife", "Shopping", "Wellness"]
     )
 
-    # Initialize conversation memory
-    conversation_memory = ConversationMemory()
+    if destination and budget > 0:
+        st.sidebar.write("### What Fits Your Budget: ")
+        display_budget_options(budget, destination)
 
-    # Display Last Conversations
+    # Display Last Conversations, without blocking the page while the memory models load
     st.sidebar.write("### Last Conversations: ")
-    recent_conversations = conversation_memory.get_recent_history(5)
-    for i, conv in enumerate(recent_conversations, 1):
-        st.sidebar.write(f"{i}. User: {conv['user_message'][:30]}...")
+    if conversation_memory_ready():
+        recent_conversations = get_conversation_memory().get_recent_history(5)
+        for i, conv in enumerate(recent_conversations, 1):
+            st.sidebar.write(f"{i}. User: {conv['user_message'][:30]}...")
+    else:
+        st.sidebar.caption("Loading conversation history...")
 
     if destination and budget > 0 and interests:
         st.title("🌍 Voyager: Your Intelligent Travel Companion")
         st.markdown("*Plan your perfect journey with AI-powered insights*")
         
         col1, col2, col3 = st.columns(3)
-        
-        # Fetch weather, attractions, and recommendations
-        weather_data = get_weather_info(destination)
-        attractions = get_attractions(destination)
-        recommendations = get_destination_recommendations(destination)
 
         with col1:
             st.subheader("🌤️ Weather Forecast")
-            if weather_data:
-                weather_description = weather_data['weather'][0]['description']
-                temperature = weather_data['main']['temp']
-                st.markdown(f"**{weather_description}** - {temperature}°C")
-            else:
-                st.write("Weather data not available.")
-
+            weather_slot = st.empty()
         with col2:
             st.subheader("🏆 Top Attractions")
-            if attractions:
-                for attraction in attractions:
-                    st.markdown(f"- {attraction.get('name', 'Unnamed Attraction')}")
-            else:
-                st.write("No attractions data available.")
-
+            attractions_slot = st.empty()
         with col3:
             st.subheader("🌍 Travel Blogs")
-            if recommendations:
-                display_recommendations(recommendations[:3])
-            else:
-                st.write("No travel recommendations found.")
-        
+            recommendations_slot = st.empty()
+
+        # Fetch weather, attractions, and recommendations in parallel,
+        # rendering each one as soon as it arrives
+        renderers = {
+            "weather": (weather_slot, display_weather),
+            "attractions": (attractions_slot, display_attractions),
+            "recommendations": (recommendations_slot, lambda recs: display_recommendations(recs[:3])),
+        }
+        results = {}
+        for name, result, error in iter_destination_data(destination):
+            results[name] = result
+            if error:
+                st.error(error)
+            slot, render = renderers[name]
+            with slot.container():
+                render(result)
+
+        weather_data = results["weather"]
+        attractions = results["attractions"]
+
         st.subheader("💰 Budget Breakdown")
-        budget_info = estimate_trip_budget(destination)
+        budget_info = estimate_trip_budget(destination, duration=PLAN_DAYS)
         if budget_info:
             budget_fig = generate_budget_visualization(budget_info)
             st.plotly_chart(budget_fig)
         else:
             st.write("Could not estimate the budget. Please try again.")
 
-        if weather_data and len(attractions) > 0:
+        if can_plan(weather_data, attractions):
             if st.button("✨ Craft My Journey", use_container_width=True):
                 # Generate travel plan using Groq API
-                travel_plan = generate_travel_plan(destination, budget, interests, weather_data, attractions)
                 st.subheader("🗺️ Personalized Travel Plan")
-                st.write(travel_plan)
+                if LLM_STREAMING:
+                    # Render tokens as they arrive; write_stream returns the full text
+                    status = {}
+                    travel_plan = st.write_stream(
+                        stream_travel_plan(destination, budget, interests, weather_data, attractions, status)
+                    )
+                    error = status.get("error")
+                else:
+                    result = generate_travel_plan(destination, budget, interests, weather_data, attractions)
+                    travel_plan, error = result["plan"], result["error"]
+                    st.write(travel_plan)
+
+                if error:
+                    st.error(error)
+                    return
 
                 # Generate PDF for Download
-                pdf_file_path = generate_pdf(travel_plan, destination)
-                st.download_button("Download Travel Plan as PDF", 
-                                   data=open(pdf_file_path, "rb"), 
-                                   file_name=pdf_file_path)
+                st.download_button("Download Travel Plan as PDF",
+                                   data=generate_pdf_bytes(travel_plan, destination),
+                                   file_name=f"{destination}_travel_plan.pdf",
+                                   mime="application/pdf")
 
-                # Save the conversation in memory
-                conversation_memory.add_conversation(
+                # Save the conversation in memory scoped to this browser session
+                get_conversation_memory().add_conversation(
                     f"Travel Plan for {destination}", 
                     travel_plan
                 )
         else:
-            st.error("Could not fetch weather or attractions. Please try again.")
+            st.error(MISSING_DATA_MESSAGE)
     else:
         st.warning("Please fill in all fields.")
-def generate_travel_plan(destination, budget, interests, weather_data, attractions):
-    user_query = f"""
-    You are a friendly and knowledgeable travel guide. Based on the following:
-    Destination: {destination}
-    Budget: {budget}
-    Interests: {interests}
-    Weather: {weather_data['weather'][0]['description']} with a temperature of {weather_data['main']['temp']}°C
-    Attractions: {', '.join([attraction['name'] for attraction in attractions])}
-
-    Please create a personalized, friendly, and engaging 5 day travel plan. Make sure to:
-    1. Provide a day-by-day itinerary with fun activities, places to visit, and food recommendations.
-    2. Suggest budget-friendly options while considering the user's interests and preferences.
-    3. Include helpful travel tips, such as what to pack or how to get around.
-    4. Keep the tone conversational and warm, like a local guide sharing their favorite spots.
-    """
-
-    try:
-        response = completion(
-            model="groq/llama3-8b-8192",  # The model you wish to use
-            messages=[{"role": "user", "content": user_query}],
-            temperature=0.9,  # Adjust creativity level (0.0 - 1.0)
-            max_tokens=3500,  # Control the length of the response
-            top_p=0.7,  # Nucleus sampling (0.0 - 1.0)
-            frequency_penalty=0.5,  # Avoid repetition of words
-            presence_penalty=0.3  # Reduce repetition of topics
-        )
-        return response['choices'][0]['message']['content']
-    except Exception as e:
-        st.error(f"Error generating travel plan: {e}")
-        return "Sorry, there was an error generating your travel plan."
-
 def main():
     """
     Multi-page Streamlit application
@@ -150,12 +167,24 @@ def main():
         layout="wide"
     )
 
+    # Start loading the shared NLP models and litellm once per server process
+    if NLP_WORKERS:
+        # spaCy and the embedding model load in the worker processes instead
+        model_registry.warm_up(spacy_model=None, embedding_model=None, chroma_directory=CONVERSATION_MEMORY_DIR,
+                               extra_loaders=(load_litellm, get_nlp_pool))
+    else:
+        model_registry.warm_up(chroma_directory=CONVERSATION_MEMORY_DIR, extra_loaders=(load_litellm,))
+    # Serves /metrics on TELEMETRY_PORT when it is set
+    telemetry.start_metrics_server()
+
     # Sidebar for page navigation
     page = st.sidebar.radio("Navigate", ["Travel Planner", "AI Assistant Chatbot"])
 
     if page == "Travel Planner":
         travel_planner_page()
     else:
+        # The chatbot page pulls in the NLP stack; import it only when opened
+        from pages.chatbot_page import chatbot_page
         chatbot_page()
 
 if __name__ == "__main__":
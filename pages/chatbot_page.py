@@ -1,6 +1,7 @@
 import streamlit as st
-from litellm import completion
-from services.nlp_services import NLPService, ConversationMemory
+from services.llm_services import LLM_STREAMING
+from services.chat_service import prepare_chat, chat_reply, stream_chat_reply
+from utils.session_utils import get_conversation_memory
 import streamlit.components.v1 as components
 
 def render_sentiment_metric_card(sentiment):
@@ -58,40 +59,31 @@ def chatbot_page():
     """
     st.title("🤖 Travel Assistant Chatbot")
     
-    # Initialize NLP services
-    nlp_service = NLPService()
-    conversation_memory = ConversationMemory()
+    conversation_memory = get_conversation_memory()
     
     # Chat input
     user_message = st.chat_input("Ask me anything about your travel plans!")
     
     if user_message:
-        # Retrieve relevant context from memory
-        relevant_context = conversation_memory.retrieve_relevant_context(user_message)
-        context = "\n".join([str(item) for item in relevant_context]) if relevant_context else ""
-
-        full_message = f"{context}\nUser: {user_message}"
-
-        # Sentiment Analysis
-        sentiment = nlp_service.analyze_sentiment(user_message)
+        # Analysis and token-budgeted prompt come from the headless chat service
+        prepared = prepare_chat(conversation_memory, user_message)
+        analysis, context_stats = prepared['analysis'], prepared['context']
+        sentiment = analysis['sentiment']
         
         # Render sentiment metric card
         render_sentiment_metric_card(sentiment)
 
-        # Intent Analysis
-        intent_analysis = nlp_service.analyze_conversation_intent(user_message)
-        
         # Display Detected Intents
-        if intent_analysis['detected_intents']:
+        if analysis['detected_intents']:
             st.subheader("🎯 Detected Intents")
-            for intent in intent_analysis['detected_intents']:
+            for intent in analysis['detected_intents']:
                 st.write(f"**Intent**: {intent['intent']}")
                 st.write(f"**Keywords Matched**: {', '.join(intent['keywords_matched'])}")
         else:
             st.write("No specific intent detected.")
 
         # Entity Extraction
-        entities = nlp_service.extract_key_entities(user_message)
+        entities = analysis['entities']
         
         # Display entities
         if entities:
@@ -102,18 +94,25 @@ def chatbot_page():
                     st.write(f"- {entity['entity']} (count: {entity['count']})")
         
         # Generate response using Groq API
-        conversation_history = [{"role": "user", "content": full_message}]
-        travel_assistant_response = completion(
-            model="groq/llama3-8b-8192",
-            messages=conversation_history
+        st.caption(
+            f"Context: {context_stats['turns_included']} earlier turns, "
+            f"~{context_stats['tokens_used']} tokens ({context_stats['tokens_saved']} saved)"
         )
-        chat_response = travel_assistant_response['choices'][0]['message']['content']
-        
-        # Display chat response
-        st.write(chat_response)
+        # The service saves the exchange in the conversation memory once it succeeds
+        if LLM_STREAMING:
+            # Display chat response as it is generated
+            status = {}
+            st.write_stream(stream_chat_reply(conversation_memory, user_message, prepared, status))
+            error = status.get('error')
+        else:
+            result = chat_reply(conversation_memory, user_message, prepared)
+            error = result['error']
+
+            # Display chat response
+            st.write(result['reply'])
 
-        # Save chat in the conversation memory
-        conversation_memory.add_conversation(user_message, chat_response)
+        if error:
+            st.error(error)
 
 def main():
     """
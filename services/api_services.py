@@ -1,92 +1,265 @@
-import requests
-import streamlit as st
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
 import os
 from dotenv import load_dotenv
+from services.cache import TTLCache, SQLiteCacheBackend
+from services.single_flight import SingleFlight
+from services import http_client, telemetry
 
 load_dotenv()
 
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
 FOURSQUARE_API_KEY = os.getenv("FOURSQUARE_API_KEY")
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
-def get_destination_recommendations(destination):
+
+# Provider endpoints can be pointed at local stub servers for testing
+SERPER_URL = os.getenv("SERPER_URL", "https://google.serper.dev/search")
+FOURSQUARE_URL = os.getenv("FOURSQUARE_URL", "https://api.foursquare.com/v3/places/search")
+OPENWEATHER_URL = os.getenv("OPENWEATHER_URL", "http://api.openweathermap.org/data/2.5/weather")
+
+# Per-provider request timeouts and the overall deadline for a fan-out, in seconds
+PROVIDER_TIMEOUTS = {
+    "weather": 5,
+    "attractions": 8,
+    "recommendations": 8,
+}
+FAN_OUT_DEADLINE = 12
+
+# Response cache TTLs per provider, in seconds: weather changes quickly,
+# attractions and travel blogs hardly at all
+CACHE_TTLS = {
+    "weather": 10 * 60,
+    "attractions": 24 * 60 * 60,
+    "recommendations": 24 * 60 * 60,
+}
+# Set API_CACHE_PATH to share cached responses between worker processes
+API_CACHE_PATH = os.getenv("API_CACHE_PATH")
+API_CACHE_SIZE = int(os.getenv("API_CACHE_SIZE", "512"))
+
+response_cache = TTLCache(
+    max_size=API_CACHE_SIZE,
+    backend=SQLiteCacheBackend(API_CACHE_PATH) if API_CACHE_PATH else None,
+)
+
+# Sessions looking up the same destination at the same moment share one upstream request
+_flights = {provider: SingleFlight(f"api.{provider}") for provider in CACHE_TTLS}
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="provider")
+
+
+class ProviderError(Exception):
+    """Raised when a provider answers with an unexpected status code."""
+
+
+def normalize_destination(destination):
+    """Normalize a destination name into a cache key ("  new  York" -> "new york")."""
+    return " ".join(destination.split()).casefold()
+
+
+def cached_lookup(provider):
+    """
+    Cache successful results of a destination lookup in response_cache
+
+    Failures are not cached, so a provider outage is retried on the next call.
+    Concurrent misses for the same destination are collapsed into one request
+    whose result or error every caller receives; the first caller's
+    arguments (e.g. its timeout) are used for it.
+
+    Args:
+        provider (str): Provider name, used for the key prefix and TTL
+    """
+    def decorator(fetch):
+        def fetch_and_store(key, destination, *args, **kwargs):
+            value = fetch(destination, *args, **kwargs)
+            response_cache.set(key, value, CACHE_TTLS[provider])
+            return value
+
+        @functools.wraps(fetch)
+        def wrapper(destination, *args, **kwargs):
+            key = f"{provider}:{normalize_destination(destination)}"
+            hit, value = response_cache.get(key)
+            if hit:
+                return value
+            return _flights[provider].do(key, fetch_and_store, (key, destination, *args), kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """Return hit, miss and eviction counters of the provider response cache."""
+    return response_cache.stats()
+
+
+def coalescing_stats():
+    """Return per-provider counts of upstream requests made and of calls collapsed into them."""
+    return {provider: flight.stats() for provider, flight in _flights.items()}
+
+
+def _collect_cache_metrics():
+    for name, value in cache_stats().items():
+        yield f"api_cache_{name}", {}, value
+
+
+telemetry.register_collector(_collect_cache_metrics)
+
+
+@telemetry.instrument("api.recommendations")
+@cached_lookup("recommendations")
+def fetch_destination_recommendations(destination, timeout=PROVIDER_TIMEOUTS["recommendations"]):
     """
-    Fetch destination recommendations from Serper API
-    
+    Fetch destination recommendations from Serper API without touching the UI
+
     Args:
         destination (str): Destination to search for
-    
+        timeout (float): Request timeout in seconds
+
     Returns:
         list: List of travel recommendations
+
+    Raises:
+        ProviderError: If Serper answers with a non-200 status
+        requests.RequestException: On network failure or timeout after retries
+        CircuitOpenError: If the provider's circuit breaker is open
     """
-    try:
-        url = f'https://google.serper.dev/search?q={destination} travel guide&num=10'
-        headers = {
-            'X-API-KEY': SERPER_API_KEY,
-            'Content-Type': 'application/json'
-        }
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 200:
-            data = response.json()
-            recommendations = []
-            for item in data.get('organic', []):
-                if 'travel' in item.get('title', '').lower() or 'guide' in item.get('title', '').lower():
-                    recommendations.append(item)
-            return recommendations
-        else:
-            st.error(f"Error fetching recommendations: {response.status_code}")
-            return []
-    except Exception as e:
-        st.error(f"Error in destination recommendations: {str(e)}")
-        return []
-
-def get_weather_info(destination):
+    headers = {
+        'X-API-KEY': SERPER_API_KEY,
+        'Content-Type': 'application/json'
+    }
+    params = {"q": f"{destination} travel guide", "num": 10}
+    response = http_client.get("recommendations", SERPER_URL, headers=headers, params=params, timeout=timeout)
+
+    if response.status_code != 200:
+        raise ProviderError(f"Error fetching recommendations: {response.status_code}")
+
+    data = response.json()
+    recommendations = []
+    for item in data.get('organic', []):
+        if 'travel' in item.get('title', '').lower() or 'guide' in item.get('title', '').lower():
+            recommendations.append(item)
+    return recommendations
+
+
+@telemetry.instrument("api.weather")
+@cached_lookup("weather")
+def fetch_weather_info(destination, timeout=PROVIDER_TIMEOUTS["weather"]):
     """
-    Fetch weather information for a destination
-    
+    Fetch weather information from OpenWeatherMap without touching the UI
+
     Args:
         destination (str): City or location name
-    
+        timeout (float): Request timeout in seconds
+
     Returns:
-        dict: Weather information or None if fetch fails
+        dict: Weather information
+
+    Raises:
+        ProviderError: If OpenWeatherMap answers with a non-200 status
+        requests.RequestException: On network failure or timeout after retries
+        CircuitOpenError: If the provider's circuit breaker is open
     """
-    try:
-        url = f'http://api.openweathermap.org/data/2.5/weather?q={destination}&appid={OPENWEATHER_API_KEY}&units=metric'
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Error fetching weather: {response.status_code}")
-            return None
-    except Exception as e:
-        st.error(f"Error in weather fetch: {str(e)}")
-        return None
-
-def get_attractions(destination):
+    params = {"q": destination, "appid": OPENWEATHER_API_KEY, "units": "metric"}
+    response = http_client.get("weather", OPENWEATHER_URL, params=params, timeout=timeout)
+
+    if response.status_code != 200:
+        raise ProviderError(f"Error fetching weather: {response.status_code}")
+    return response.json()
+
+
+@telemetry.instrument("api.attractions")
+@cached_lookup("attractions")
+def fetch_attractions(destination, timeout=PROVIDER_TIMEOUTS["attractions"]):
     """
-    Fetch tourist attractions for a destination
-    
+    Fetch tourist attractions from Foursquare without touching the UI
+
     Args:
         destination (str): City or location name
-    
+        timeout (float): Request timeout in seconds
+
     Returns:
         list: List of attractions
+
+    Raises:
+        ProviderError: If Foursquare answers with a non-200 status
+        requests.RequestException: On network failure or timeout after retries
+        CircuitOpenError: If the provider's circuit breaker is open
+    """
+    headers = {
+        "Accept": "application/json",
+        "Authorization": FOURSQUARE_API_KEY
+    }
+    params = {"query": "tourist attractions", "near": destination, "limit": 10}
+    response = http_client.get("attractions", FOURSQUARE_URL, headers=headers, params=params, timeout=timeout)
+
+    if response.status_code != 200:
+        raise ProviderError(f"Error fetching attractions: {response.status_code}")
+    return response.json().get('results', [])
+
+
+# Fan-out providers: name -> (fetch function, fallback value on failure)
+DESTINATION_PROVIDERS = {
+    "weather": (fetch_weather_info, None),
+    "attractions": (fetch_attractions, []),
+    "recommendations": (fetch_destination_recommendations, []),
+}
+
+
+@telemetry.instrument("api.fan_out")
+def iter_destination_data(destination, timeouts=None, deadline=FAN_OUT_DEADLINE):
     """
+    Run the weather, attractions and recommendations lookups in parallel
+
+    Results are yielded as soon as each provider answers, so the caller can
+    render them progressively. Worker threads never call Streamlit; errors are
+    returned to the caller instead.
+
+    Args:
+        destination (str): City or location name
+        timeouts (dict): Per-provider request timeouts, defaults to PROVIDER_TIMEOUTS
+        deadline (float): Total time budget in seconds for all lookups
+
+    Yields:
+        tuple: (provider name, result or fallback value, error message or None)
+    """
+    timeouts = {**PROVIDER_TIMEOUTS, **(timeouts or {})}
+    # Each lookup runs in a copy of the caller's context, so its span nests under the caller's
+    futures = {
+        _executor.submit(contextvars.copy_context().run, fetch, destination, timeouts[name]): name
+        for name, (fetch, _) in DESTINATION_PROVIDERS.items()
+    }
+
+    pending = set(futures)
     try:
-        url = "https://api.foursquare.com/v3/places/search"
-        headers = {
-            "Accept": "application/json",
-            "Authorization": FOURSQUARE_API_KEY
-        }
-        params = {"query": "tourist attractions", "near": destination, "limit": 10}
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            return response.json().get('results', [])
-        else:
-            st.error(f"Error fetching attractions: {response.status_code}")
-            return []
-    except Exception as e:
-        st.error(f"Attractions fetch error: {e}")
-        return []
\ No newline at end of file
+        for future in as_completed(futures, timeout=deadline):
+            pending.discard(future)
+            name = futures[future]
+            try:
+                yield name, future.result(), None
+            except Exception as e:
+                yield name, DESTINATION_PROVIDERS[name][1], f"{name} lookup failed: {e}"
+    except FuturesTimeoutError:
+        for future in pending:
+            future.cancel()
+            name = futures[future]
+            yield name, DESTINATION_PROVIDERS[name][1], f"{name} lookup exceeded the {deadline}s deadline"
+
+
+def fetch_destination_data(destination, timeouts=None, deadline=FAN_OUT_DEADLINE):
+    """
+    Run all destination lookups in parallel and wait for them to finish
+
+    Args:
+        destination (str): City or location name
+        timeouts (dict): Per-provider request timeouts, defaults to PROVIDER_TIMEOUTS
+        deadline (float): Total time budget in seconds for all lookups
+
+    Returns:
+        tuple: (dict of results by provider name, dict of error messages by provider name)
+    """
+    results, errors = {}, {}
+    for name, result, error in iter_destination_data(destination, timeouts, deadline):
+        results[name] = result
+        if error:
+            errors[name] = error
+    return results, errors
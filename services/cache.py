@@ -0,0 +1,167 @@
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SQLiteCacheBackend:
+    """
+    On-disk cache tier shared by every worker process on the host
+
+    Values are stored as JSON, so only JSON-serialisable results can be cached.
+    Expired rows are deleted when the backend opens and then every
+    purge_interval writes, so the file does not grow without bound.
+
+    Args:
+        path (str): SQLite database file
+        purge_interval (int): Writes between purges of expired rows
+    """
+
+    def __init__(self, path, purge_interval=256):
+        self.path = path
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._writes = itertools.count(1)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        self.purge_expired()
+
+    def _connect(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """
+        Look up a key
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            tuple: (value, expires_at) or None if the key is absent or expired
+        """
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+        # itertools.count is atomic under the GIL, so threads never purge on the same write
+        if next(self._writes) % self.purge_interval == 0:
+            self.purge_expired()
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def purge_expired(self):
+        """Delete expired rows and return how many were removed."""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a per-entry TTL
+
+    Args:
+        max_size (int): Maximum number of entries kept in memory
+        backend (SQLiteCacheBackend): Optional shared on-disk tier consulted on memory misses
+    """
+
+    def __init__(self, max_size=512, backend=None):
+        self.max_size = max_size
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key):
+        """
+        Look up a key
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, value
+                del self._entries[key]
+                self._stats["expirations"] += 1
+
+        if self.backend is not None:
+            stored = self.backend.get(key)
+            if stored is not None:
+                value, expires_at = stored
+                with self._lock:
+                    self._store(key, value, expires_at)
+                    self._stats["disk_hits"] += 1
+                return True, value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return False, None
+
+    def set(self, key, value, ttl):
+        """
+        Store a value
+
+        Args:
+            key (str): Cache key
+            value: Value to cache
+            ttl (float): Time to live in seconds
+        """
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self.backend is not None:
+            self.backend.set(key, value, expires_at)
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit, miss, eviction and expiration counters plus the current size."""
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
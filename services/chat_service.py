@@ -0,0 +1,132 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+from services import model_registry, telemetry
+from services.context_builder import build_chat_messages
+from services.llm_services import complete, stream_complete
+from services.nlp_pool import get_nlp_pool
+from services.nlp_services import NLPService, ConversationMemory
+
+# Conversation memories kept for non-Streamlit clients, least recently used first out
+CHAT_SESSION_LIMIT = int(os.getenv("CHAT_SESSION_LIMIT", "1000"))
+
+CHAT_ERROR_MESSAGE = "Sorry, I couldn't answer that right now. Please try again."
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def get_nlp_service():
+    """Return the NLPService shared by every chat session."""
+    return model_registry.get_model(("nlp_service",), NLPService)
+
+
+def get_session_memory(session_id=None):
+    """
+    Return the ConversationMemory of a session, creating it on first use
+
+    Streamlit keeps its memories in st.session_state; this registry serves
+    HTTP and batch clients, which identify sessions by id.
+
+    Args:
+        session_id (str): Session identifier, or None to start a new session
+
+    Returns:
+        ConversationMemory: Memory scoped to the session
+    """
+    session_id = session_id or uuid.uuid4().hex
+    with _sessions_lock:
+        memory = _sessions.get(session_id)
+        if memory is not None:
+            _sessions.move_to_end(session_id)
+            return memory
+
+    memory = ConversationMemory(session_id=session_id)
+    with _sessions_lock:
+        memory = _sessions.setdefault(session_id, memory)
+        while len(_sessions) > CHAT_SESSION_LIMIT:
+            _sessions.popitem(last=False)
+    return memory
+
+
+@telemetry.instrument("chat.prepare")
+def prepare_chat(memory, user_message):
+    """
+    Analyze a message and build its token-budgeted prompt
+
+    Args:
+        memory (ConversationMemory): The session's memory
+        user_message (str): The new user message
+
+    Returns:
+        dict: analysis (sentiment, detected_intents, entities), messages (chat
+            prompt) and context (prompt packing stats)
+    """
+    # Merge recent turns with relevant memories into a token-budgeted prompt
+    messages, context = build_chat_messages(
+        user_message,
+        memory.get_recent_history(5),
+        memory.retrieve_relevant_memories(user_message)
+    )
+    # Sentiment, intent and entity analysis in a single pass, in a worker process when the pool is enabled
+    pool = get_nlp_pool()
+    analysis = pool.analyze(user_message) if pool is not None else get_nlp_service().analyze(user_message)
+    return {"analysis": analysis, "messages": messages, "context": context}
+
+
+@telemetry.instrument("chat.reply")
+def chat_reply(memory, user_message, prepared=None):
+    """
+    Answer a message in one blocking completion and remember the exchange
+
+    Args:
+        memory (ConversationMemory): The session's memory
+        user_message (str): The new user message
+        prepared (dict): Result of prepare_chat, computed if omitted
+
+    Returns:
+        dict: prepare_chat's fields plus reply and error (None on success)
+    """
+    prepared = prepared or prepare_chat(memory, user_message)
+    try:
+        response = complete(messages=prepared["messages"])
+        reply = response['choices'][0]['message']['content']
+    except Exception as e:
+        return {**prepared, "reply": CHAT_ERROR_MESSAGE, "error": f"Error generating reply: {e}"}
+
+    memory.add_conversation(user_message, reply)
+    return {**prepared, "reply": reply, "error": None}
+
+
+@telemetry.instrument("chat.stream_reply")
+def stream_chat_reply(memory, user_message, prepared=None, status=None):
+    """
+    Stream a reply and remember the exchange once it completes
+
+    Args:
+        memory (ConversationMemory): The session's memory
+        user_message (str): The new user message
+        prepared (dict): Result of prepare_chat, computed if omitted
+        status (dict): Optional dict filled with "error" (message, or None on
+            success) once the stream ends
+
+    Yields:
+        str: Reply text chunks, or CHAT_ERROR_MESSAGE if generation fails
+    """
+    status = {} if status is None else status
+    status["error"] = None
+    prepared = prepared or prepare_chat(memory, user_message)
+
+    chunks = []
+    try:
+        for chunk in stream_complete(messages=prepared["messages"]):
+            chunks.append(chunk)
+            yield chunk
+    except Exception as e:
+        status["error"] = f"Error generating reply: {e}"
+        yield CHAT_ERROR_MESSAGE
+        return
+
+    memory.add_conversation(user_message, "".join(chunks))
@@ -0,0 +1,104 @@
+import math
+import os
+
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "1500"))
+# Longest a single remembered reply may be once packed (a full travel plan is ~3500 tokens)
+MAX_TOKENS_PER_TURN = int(os.getenv("CHAT_CONTEXT_MAX_TOKENS_PER_TURN", "300"))
+
+SYSTEM_PROMPT = (
+    "You are a friendly and knowledgeable travel assistant. "
+    "Use the earlier conversation when it is relevant to the user's question."
+)
+
+# Per-message overhead of the chat format (role markers and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+RELEVANCE_WEIGHT = 0.7
+RECENCY_WEIGHT = 0.3
+# Retrieved memories less similar than this are noise unless they are also recent
+MIN_RELEVANCE = 0.2
+
+
+def estimate_tokens(text):
+    """Approximate token count: about four characters per token for English text."""
+    return math.ceil(len(text) / 4)
+
+
+def _truncate(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max_tokens * 4].rsplit(" ", 1)[0] + " …"
+
+
+def _turn_tokens(turn):
+    return (estimate_tokens(turn["user_message"]) + estimate_tokens(turn["ai_response"])
+            + 2 * MESSAGE_OVERHEAD_TOKENS)
+
+
+def build_chat_messages(user_message, recent_history, memories, token_budget=CHAT_CONTEXT_TOKEN_BUDGET,
+                        system_prompt=SYSTEM_PROMPT, max_tokens_per_turn=MAX_TOKENS_PER_TURN):
+    """
+    Pack recent turns and retrieved memories into role-tagged chat messages under a token budget
+
+    Turns from both sources are deduplicated by id, scored by a blend of
+    retrieval relevance and recency, and added best-first while they fit.
+    The chosen turns are emitted in chronological order as user/assistant
+    pairs between the system prompt and the new user message.
+
+    Args:
+        user_message (str): The new user message
+        recent_history (list): Entries from ConversationMemory.get_recent_history
+        memories (list): Entries from ConversationMemory.retrieve_relevant_memories
+        token_budget (int): Maximum estimated prompt tokens
+        system_prompt (str): System message placed first
+        max_tokens_per_turn (int): Cap on each remembered user message and reply
+
+    Returns:
+        tuple: (messages, stats) where stats holds tokens_used, tokens_saved
+            (versus sending every candidate turn in full), turns_included and
+            turns_dropped
+    """
+    turns = {}
+    for entry in recent_history:
+        turns[entry["id"]] = {**entry, "relevance": 0.0}
+    for entry in memories:
+        # Unit-length embeddings: squared L2 distance in [0, 4] maps to similarity in [-1, 1]
+        relevance = 1 - entry.get("distance", 2.0) / 2
+        if relevance < MIN_RELEVANCE and entry["id"] not in turns:
+            continue
+        turns.setdefault(entry["id"], {**entry, "relevance": relevance})["relevance"] = relevance
+
+    # Most recent turn gets recency 1, decaying by half per older turn
+    by_age = sorted(turns.values(), key=lambda turn: turn["timestamp"], reverse=True)
+    for rank, turn in enumerate(by_age):
+        turn["score"] = RELEVANCE_WEIGHT * turn["relevance"] + RECENCY_WEIGHT * 0.5 ** rank
+
+    naive_tokens = (estimate_tokens(system_prompt) + estimate_tokens(user_message) + 2 * MESSAGE_OVERHEAD_TOKENS
+                    + sum(_turn_tokens(turn) for turn in turns.values()))
+
+    used = estimate_tokens(system_prompt) + estimate_tokens(user_message) + 2 * MESSAGE_OVERHEAD_TOKENS
+    chosen = []
+    for turn in sorted(turns.values(), key=lambda turn: turn["score"], reverse=True):
+        packed = {
+            **turn,
+            "user_message": _truncate(turn["user_message"], max_tokens_per_turn),
+            "ai_response": _truncate(turn["ai_response"], max_tokens_per_turn),
+        }
+        cost = _turn_tokens(packed)
+        if used + cost > token_budget:
+            continue
+        used += cost
+        chosen.append(packed)
+
+    messages = [{"role": "system", "content": system_prompt}]
+    for turn in sorted(chosen, key=lambda turn: turn["timestamp"]):
+        messages.append({"role": "user", "content": turn["user_message"]})
+        messages.append({"role": "assistant", "content": turn["ai_response"]})
+    messages.append({"role": "user", "content": user_message})
+
+    stats = {
+        "tokens_used": used,
+        "tokens_saved": max(0, naive_tokens - used),
+        "turns_included": len(chosen),
+        "turns_dropped": len(turns) - len(chosen),
+    }
+    return messages, stats
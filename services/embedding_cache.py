@@ -0,0 +1,273 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from services import telemetry
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+# Set EMBEDDING_CACHE_PATH to add a memory-mapped on-disk tier shared across restarts
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+EMBEDDING_CACHE_DISK_CAPACITY = int(os.getenv("EMBEDDING_CACHE_DISK_CAPACITY", "200000"))
+# Set EMBEDDING_STORAGE_DTYPE=float16 to halve the memory and disk taken by cached vectors
+EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32")
+# Storage dtype -> file suffix of the memory-mapped matrix
+STORAGE_DTYPES = {"float32": "f32", "float16": "f16"}
+
+
+def embedding_key(model_name, text, normalize=False):
+    """Content address of an embedding: hash of model name, options and whitespace-normalized text."""
+    normalized = " ".join(text.split())
+    payload = f"{model_name}\0{int(normalize)}\0{normalized}".encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class MmapVectorStore:
+    """
+    Fixed-capacity on-disk vector tier
+
+    Vectors live in a memory-mapped matrix ({path}.f32, or {path}.f16 for
+    float16) used as a ring buffer; a SQLite index ({path}.sqlite) maps keys
+    to rows. Once full, the oldest rows are overwritten.
+
+    Args:
+        path (str): Path prefix for the matrix and index files
+        dim (int): Vector dimension
+        capacity (int): Number of rows in the matrix
+        dtype (str): Storage dtype, a key of STORAGE_DTYPES
+    """
+
+    def __init__(self, path, dim, capacity=EMBEDDING_CACHE_DISK_CAPACITY, dtype="float32"):
+        self.path = path
+        self.dim = dim
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        matrix_path = f"{path}.{STORAGE_DTYPES[dtype]}"
+        mode = "r+" if os.path.exists(matrix_path) else "w+"
+        self.vectors = np.memmap(matrix_path, dtype=self.dtype, mode=mode, shape=(capacity, dim))
+        self._conn = sqlite3.connect(f"{path}.sqlite", timeout=5, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS slots (key TEXT PRIMARY KEY, slot INTEGER UNIQUE)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('next_slot', 0)")
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('dim', ?)", (dim,))
+            stored_dim = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()[0]
+        if stored_dim != dim:
+            raise ValueError(f"Embedding cache at {path} holds {stored_dim}-d vectors, not {dim}-d")
+
+    @staticmethod
+    def stored_dim(path, dtype="float32"):
+        """Return the vector dimension of an existing store, or None if there is none."""
+        if not os.path.exists(f"{path}.sqlite") or not os.path.exists(f"{path}.{STORAGE_DTYPES[dtype]}"):
+            return None
+        conn = sqlite3.connect(f"{path}.sqlite", timeout=5)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT slot FROM slots WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return np.array(self.vectors[row[0]], dtype=np.float32)
+
+    def put(self, key, vector):
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM slots WHERE key = ?", (key,)).fetchone():
+                return
+            next_slot = self._conn.execute("SELECT value FROM meta WHERE name = 'next_slot'").fetchone()[0]
+            slot = next_slot % self.capacity
+            self._conn.execute("UPDATE meta SET value = ? WHERE name = 'next_slot'", (next_slot + 1,))
+            self._conn.execute("DELETE FROM slots WHERE slot = ?", (slot,))
+            self._conn.execute("INSERT INTO slots VALUES (?, ?)", (key, slot))
+            self.vectors[slot] = vector
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+
+    def bytes_used(self):
+        return len(self) * self.dim * self.dtype.itemsize
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache with an in-memory LRU tier
+
+    Vectors are kept in the storage dtype and returned as float32. In
+    float16 the disk tier uses its own files ({disk_path}.float16.*), so
+    switching dtype never reads a matrix written in the other one.
+
+    Args:
+        max_entries (int): Vectors kept in memory
+        disk_path (str): Optional path prefix for a memory-mapped on-disk tier
+        disk_capacity (int): Vectors kept on disk
+        dtype (str): Storage dtype, "float32" or "float16"
+    """
+
+    def __init__(self, max_entries=EMBEDDING_CACHE_SIZE, disk_path=EMBEDDING_CACHE_PATH,
+                 disk_capacity=EMBEDDING_CACHE_DISK_CAPACITY, dtype=EMBEDDING_STORAGE_DTYPE):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage dtype {dtype!r}, expected one of {', '.join(STORAGE_DTYPES)}")
+        if disk_path and dtype != "float32":
+            disk_path = f"{disk_path}.{dtype}"
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.disk_capacity = disk_capacity
+        self.dtype = dtype
+        self._disk = None
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        # Reopen an existing disk tier now; a new one is created on the first put
+        if disk_path:
+            dim = MmapVectorStore.stored_dim(disk_path, dtype)
+            if dim is not None:
+                self._disk_tier(dim)
+
+    def _disk_tier(self, dim):
+        if self.disk_path and self._disk is None:
+            self._disk = MmapVectorStore(self.disk_path, dim, self.disk_capacity, self.dtype)
+        return self._disk
+
+    def get(self, key):
+        """
+        Look up a vector
+
+        Args:
+            key (str): Key from embedding_key()
+
+        Returns:
+            numpy.ndarray: Cached float32 vector, or None on a miss
+        """
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._stats["hits"] += 1
+                return vector.astype(np.float32, copy=False)
+            disk = self._disk
+
+        if disk is not None:
+            vector = disk.get(key)
+            if vector is not None:
+                with self._lock:
+                    self._store(key, vector.astype(self.dtype))
+                    self._stats["disk_hits"] += 1
+                return vector
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key, vector):
+        vector = np.asarray(vector, dtype=self.dtype)
+        with self._lock:
+            self._store(key, vector)
+            disk = self._disk_tier(vector.shape[-1])
+        if disk is not None:
+            disk.put(key, vector)
+
+    def _store(self, key, vector):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while len(self._memory) > self.max_entries:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self._stats["evictions"] += 1
+
+    def stats(self):
+        """Return hit/miss counters, hit rate, entry counts and bytes used per tier."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+            disk = self._disk
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["disk_bytes"] = disk.bytes_used() if disk is not None else 0
+        return stats
+
+
+class CachedEmbedder:
+    """
+    SentenceTransformer wrapper that serves repeated texts from an EmbeddingCache
+
+    Only the texts missing from the cache reach the model, in one batch.
+
+    Args:
+        embedder (SentenceTransformer): Model used on cache misses
+        model_name (str): Model name, part of the cache key
+        cache (EmbeddingCache): Shared cache
+    """
+
+    def __init__(self, embedder, model_name, cache):
+        self.embedder = embedder
+        self.model_name = model_name
+        self.cache = cache
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        """
+        Encode one text or a list of texts, like SentenceTransformer.encode
+
+        Returns:
+            numpy.ndarray: float32 vector for a single text, matrix for a list
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        keys = [embedding_key(self.model_name, text, normalize_embeddings) for text in texts]
+
+        vectors = [self.cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            with telemetry.span("embedding.encode"):
+                encoded = self.embedder.encode(
+                    [texts[i] for i in missing],
+                    batch_size=batch_size,
+                    normalize_embeddings=normalize_embeddings,
+                    convert_to_numpy=True,
+                    **kwargs
+                )
+            for i, vector in zip(missing, encoded):
+                vector = np.asarray(vector, dtype=np.float32)
+                self.cache.put(keys[i], vector)
+                vectors[i] = vector
+
+        if single:
+            return vectors[0]
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(vectors)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Return the process-wide embedding cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+            telemetry.register_collector(_collect_metrics)
+        return _cache
+
+
+def _collect_metrics():
+    for name, value in _cache.stats().items():
+        yield f"embedding_cache_{name}", {}, value
@@ -0,0 +1,173 @@
+"""
+Headless HTTP API for the planner and chatbot pipelines
+
+Blocking pipeline work runs in worker threads, so one event loop serves many
+concurrent requests. Chat sessions and their conversation memory live in this
+process, and a persistent Chroma store can only be opened by one process, so
+the API always runs as a single uvicorn worker. Failures come back as JSON
+bodies with an "error" field rather than UI side effects.
+
+Usage:
+    python -m services.http_api [--host 127.0.0.1] [--port 8000]
+"""
+import argparse
+import asyncio
+from typing import List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from services import telemetry
+from services.api_services import DESTINATION_PROVIDERS, PROVIDER_TIMEOUTS, fetch_destination_data
+from services.chat_service import get_session_memory, prepare_chat, chat_reply, stream_chat_reply
+from services.planner_service import plan_trip, stream_travel_plan, can_plan, MISSING_DATA_MESSAGE
+
+app = FastAPI(title="Voyager API")
+
+
+class PlanRequest(BaseModel):
+    destination: str = Field(min_length=1)
+    budget: float = Field(gt=0)
+    interests: List[str] = Field(min_length=1)
+    session_id: Optional[str] = None
+    stream: bool = False
+
+
+class ChatRequest(BaseModel):
+    message: str = Field(min_length=1)
+    session_id: Optional[str] = None
+    stream: bool = False
+
+
+def _error(status_code, message, **details):
+    return JSONResponse(status_code=status_code, content={"error": message, **details})
+
+
+async def _stream_text(chunks, status, headers=None, **details):
+    """
+    Stream text chunks, or return a 502 error body if the stream fails before its first chunk
+
+    The pipelines yield an error message as text and set status["error"]. A
+    failure after the first chunk aborts the response instead, so the client
+    sees a truncated body rather than an error message passed off as content.
+    """
+    first = await asyncio.to_thread(next, chunks, None)
+    if status.get("error"):
+        return _error(502, status["error"], **details)
+
+    def body():
+        if first is None:
+            return
+        yield first
+        for chunk in chunks:
+            if status.get("error"):
+                raise RuntimeError(status["error"])
+            yield chunk
+
+    # Starlette iterates the blocking generator in its thread pool
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8", headers=headers)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Span latencies, counters and cache statistics in the Prometheus text format."""
+    return PlainTextResponse(telemetry.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/destinations/{destination}")
+async def destination_data(destination: str):
+    """Weather, attractions and travel blogs, with per-provider errors."""
+    results, errors = await asyncio.to_thread(fetch_destination_data, destination)
+    return {"destination": destination, **results, "errors": errors}
+
+
+@app.get("/destinations/{destination}/{provider}")
+async def destination_lookup(destination: str, provider: str):
+    """One provider lookup: weather, attractions or recommendations."""
+    if provider not in DESTINATION_PROVIDERS:
+        return _error(404, f"Unknown provider {provider!r}", providers=list(DESTINATION_PROVIDERS))
+
+    fetch, _ = DESTINATION_PROVIDERS[provider]
+    try:
+        result = await asyncio.to_thread(fetch, destination, PROVIDER_TIMEOUTS[provider])
+    except Exception as e:
+        return _error(502, f"{provider} lookup failed: {e}", provider=provider)
+    return {"destination": destination, provider: result}
+
+
+@app.post("/plan")
+async def plan(request: PlanRequest):
+    """Generate a travel plan; with stream=true the plan text is streamed as it is written."""
+    memory = await asyncio.to_thread(get_session_memory, request.session_id) if request.session_id else None
+
+    if not request.stream:
+        trip = await asyncio.to_thread(plan_trip, request.destination, request.budget, request.interests, memory)
+        if trip["error"]:
+            return _error(502, trip["error"], **{key: value for key, value in trip.items() if key != "error"})
+        return trip
+
+    results, errors = await asyncio.to_thread(fetch_destination_data, request.destination)
+    if not can_plan(results["weather"], results["attractions"]):
+        return _error(502, MISSING_DATA_MESSAGE, errors=errors)
+
+    status = {}
+
+    def chunks():
+        plan_chunks = []
+        for chunk in stream_travel_plan(request.destination, request.budget, request.interests,
+                                        results["weather"], results["attractions"], status):
+            plan_chunks.append(chunk)
+            yield chunk
+        if memory is not None and status["error"] is None:
+            memory.add_conversation(f"Travel Plan for {request.destination}", "".join(plan_chunks))
+
+    return await _stream_text(chunks(), status)
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    """Answer a chat message within a session; a new session id is returned if none was given."""
+    memory = await asyncio.to_thread(get_session_memory, request.session_id)
+    prepared = await asyncio.to_thread(prepare_chat, memory, request.message)
+
+    if not request.stream:
+        result = await asyncio.to_thread(chat_reply, memory, request.message, prepared)
+        body = {
+            "session_id": memory.session_id,
+            "reply": result["reply"],
+            "analysis": result["analysis"],
+            "context": result["context"],
+        }
+        if result["error"]:
+            return _error(502, result["error"], **body)
+        return body
+
+    status = {}
+    return await _stream_text(
+        stream_chat_reply(memory, request.message, prepared, status),
+        status,
+        headers={"X-Session-Id": memory.session_id},
+        session_id=memory.session_id,
+    )
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    # One worker: sessions are in-process state, see the module docstring
+    uvicorn.run("services.http_api:app", host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
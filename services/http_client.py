@@ -0,0 +1,299 @@
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services import telemetry
+from services.metrics import Histogram
+
+# Retry and pooling policy shared by every external provider
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 4.0
+# Seconds a call may take in total, retries and waits included; a server asking
+# for a longer Retry-After wait gets no retry
+RETRY_DEADLINE = float(os.getenv("HTTP_RETRY_DEADLINE", "30"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+MAX_CONCURRENCY_PER_HOST = int(os.getenv("HTTP_MAX_CONCURRENCY_PER_HOST", "8"))
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 30.0
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is rejecting calls."""
+
+
+class RetryableError(Exception):
+    """
+    Signals a transient failure that the retry loop may try again
+
+    Args:
+        cause (Exception): Underlying exception, re-raised once retries run out
+        response (requests.Response): Last HTTP response, returned once retries run out
+        retry_after (float): Server-requested delay in seconds, if any
+    """
+
+    def __init__(self, cause=None, response=None, retry_after=None):
+        super().__init__(str(cause or response))
+        self.cause = cause
+        self.response = response
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for one provider
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail fast; after reset_timeout a single trial call is let through. Only
+    transient failures count: a rejected request says nothing about the
+    provider's health.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+        """End a call that neither succeeded nor failed transiently, freeing the half-open trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def _build_session():
+    session = requests.Session()
+    # Retries are handled by request() so they can honour Retry-After and the breaker
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+session = _build_session()
+
+_state_lock = threading.Lock()
+_breakers = {}
+_host_slots = {}
+_histograms = defaultdict(Histogram)
+_retry_counts = defaultdict(int)
+
+
+def get_breaker(provider):
+    with _state_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker()
+        return _breakers[provider]
+
+
+@contextmanager
+def _host_slot(host):
+    if host is None:
+        yield
+        return
+    with _state_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(MAX_CONCURRENCY_PER_HOST)
+        slot = _host_slots[host]
+    with slot:
+        yield
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header value
+
+    Args:
+        value (str): Delay in seconds or an HTTP date
+
+    Returns:
+        float: Delay in seconds, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Return the sleep before retry number attempt: full jitter, or Retry-After if larger."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        # The server's wait is honoured in full; call_with_retries gives up if it is too long
+        delay = max(delay, retry_after)
+    return delay
+
+
+def call_with_retries(provider, host, attempt, max_retries=MAX_RETRIES, deadline=RETRY_DEADLINE):
+    """
+    Run a provider call under the shared retry, concurrency and breaker policy
+
+    Args:
+        provider (str): Provider name used for the breaker and latency histogram
+        host (str): Host used for the per-host concurrency limit, or None when
+            the caller limits concurrency itself
+        attempt (callable): Performs one try; raises RetryableError on transient
+            failures, the only ones counted by the circuit breaker
+        max_retries (int): Maximum number of retries after the first try
+        deadline (float): Seconds the whole call may take; no retry is started
+            that would have to wait past it
+
+    Returns:
+        object: Result of the first successful attempt, or the last HTTP
+            response once retries are exhausted or the deadline is reached
+
+    Raises:
+        CircuitOpenError: If the provider's circuit is open
+    """
+    breaker = get_breaker(provider)
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {provider}, skipping call")
+
+    with _state_lock:
+        histogram = _histograms[provider]
+    give_up_at = time.monotonic() + deadline
+    for try_number in range(max_retries + 1):
+        with _host_slot(host):
+            start = time.perf_counter()
+            try:
+                result = attempt()
+            except RetryableError as e:
+                error = e
+            except Exception:
+                # Client errors (bad request, auth, validation) are not the provider failing
+                histogram.observe(time.perf_counter() - start)
+                breaker.release()
+                raise
+            else:
+                histogram.observe(time.perf_counter() - start)
+                breaker.record_success()
+                return result
+            histogram.observe(time.perf_counter() - start)
+
+        if try_number == max_retries:
+            break
+        delay = backoff_delay(try_number, error.retry_after)
+        if time.monotonic() + delay > give_up_at:
+            break
+        with _state_lock:
+            _retry_counts[provider] += 1
+        time.sleep(delay)
+
+    breaker.record_failure()
+    if error.response is not None:
+        return error.response
+    raise error.cause
+
+
+def request(provider, method, url, max_retries=MAX_RETRIES, **kwargs):
+    """
+    Send an HTTP request through the shared pooled session
+
+    429 and 5xx responses and connection errors are retried with jittered
+    backoff. Non-retryable responses are returned as-is for the caller to check.
+
+    Args:
+        provider (str): Provider name, e.g. "weather"
+        method (str): HTTP method
+        url (str): Request URL
+        max_retries (int): Maximum number of retries
+        **kwargs: Passed to requests.Session.request (timeout, params, headers...)
+
+    Returns:
+        requests.Response: Final response
+    """
+    def attempt():
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise RetryableError(cause=e)
+        if response.status_code in RETRY_STATUSES:
+            raise RetryableError(
+                response=response,
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+        return response
+
+    return call_with_retries(provider, urlparse(url).netloc, attempt, max_retries)
+
+
+def get(provider, url, **kwargs):
+    return request(provider, "GET", url, **kwargs)
+
+
+def latency_stats():
+    """Return latency percentiles, retry counts and breaker state for every provider."""
+    with _state_lock:
+        providers = set(_histograms) | set(_breakers)
+        retries = dict(_retry_counts)
+    stats = {}
+    for provider in sorted(providers):
+        snapshot = _histograms[provider].snapshot()
+        snapshot.pop("buckets")
+        stats[provider] = {
+            **snapshot,
+            "retries": retries.get(provider, 0),
+            "circuit": get_breaker(provider).state,
+        }
+    return stats
+
+
+def _collect_metrics():
+    with _state_lock:
+        histograms = dict(_histograms)
+        retries = dict(_retry_counts)
+    for provider, histogram in histograms.items():
+        yield "http_request_seconds", {"provider": provider}, histogram
+    for provider, count in retries.items():
+        yield "http_retries", {"provider": provider}, count
+
+
+telemetry.register_collector(_collect_metrics)
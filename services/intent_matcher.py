@@ -0,0 +1,137 @@
+import json
+import re
+
+# Built-in vocabulary, used when no intent vocabulary file is available
+DEFAULT_VOCABULARY = {
+    "travel_planning": {"trip": 1.0, "vacation": 1.0, "travel": 1.0, "destination": 1.0, "plan": 1.0},
+    "budget_inquiry": {"cost": 1.0, "price": 1.0, "budget": 1.0, "expense": 1.0, "money": 1.0},
+    "recommendation": {"suggest": 1.0, "recommend": 1.0, "advice": 1.0, "help": 1.0},
+    "complaint": {"problem": 1.0, "issue": 1.0, "bad": 1.0, "terrible": 1.0, "wrong": 1.0},
+    "praise": {"great": 1.0, "awesome": 1.0, "amazing": 1.0, "wonderful": 1.0, "excellent": 1.0}
+}
+
+_WORD_RE = re.compile(r"\w+")
+# Distinct words whose stems (and keyword sets whose results) are memoized per
+# matcher; chat vocabulary repeats heavily, so Porter runs once per new word
+STEM_CACHE_SIZE = 65536
+
+
+def _porter_stem():
+    # nltk ships with textblob; it is imported when a matcher is built, not at startup
+    from nltk.stem.porter import PorterStemmer
+    return PorterStemmer().stem
+
+
+class IntentMatcher:
+    """
+    Whole-word keyword matcher compiled once into a table of stems
+
+    Keywords and message words are reduced to their Porter stems, so
+    "recommendations", "traveling" and "budgeting" match "recommend",
+    "travel" and "budget". A message is tokenized once and its stems (plus
+    n-grams when the vocabulary has multi-word keywords) are intersected
+    with the table, so the cost per message depends on its length, not on
+    the vocabulary size. Matching whole tokens gives word boundaries for
+    free: "planet" never matches "plan".
+
+    Args:
+        vocabulary (dict): Mapping of intent -> {keyword: weight}
+    """
+
+    def __init__(self, vocabulary):
+        self.vocabulary = {
+            intent: {" ".join(_WORD_RE.findall(keyword.lower())): float(weight) for keyword, weight in keywords.items()}
+            for intent, keywords in vocabulary.items()
+        }
+
+        self._porter = _porter_stem()
+        # Whitespace-separated chunk of a message (e.g. "rome?") -> stems of its words
+        self._chunks = {}
+        self._results = {}
+
+        # Stemmed form -> keywords it stands for (a keyword may belong to several intents)
+        self._forms = {}
+        for keywords in self.vocabulary.values():
+            for keyword in keywords:
+                self._forms.setdefault(" ".join(self._porter(word) for word in keyword.split()), set()).add(keyword)
+        self._max_words = max((len(form.split()) for form in self._forms), default=1)
+
+        # Keyword -> (intent position, keyword position, intent) for ordering results
+        self._weighted = {intent: list(keywords.items()) for intent, keywords in self.vocabulary.items()}
+        self._placements = {}
+        for intent_index, (intent, keywords) in enumerate(self.vocabulary.items()):
+            for keyword_index, keyword in enumerate(keywords):
+                self._placements.setdefault(keyword, []).append((intent_index, keyword_index, intent))
+
+    def _stem_chunk(self, chunk):
+        if len(self._chunks) >= STEM_CACHE_SIZE:
+            self._chunks.clear()
+        stems = tuple(self._porter(word) for word in _WORD_RE.findall(chunk))
+        self._chunks[chunk] = stems
+        return stems
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Load a vocabulary from a JSON file of {intent: {keyword: weight}}
+
+        Args:
+            path (str): Path to the vocabulary file
+
+        Returns:
+            IntentMatcher: Compiled matcher
+        """
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, text_lower):
+        """
+        Find the intents whose keywords occur in a lowercased text
+
+        Args:
+            text_lower (str): Lowercased input text
+
+        Returns:
+            list: {"intent", "keywords_matched", "score"} dicts in vocabulary
+                order, keywords in vocabulary order
+        """
+        # Splitting on whitespace and tokenizing each distinct chunk once is much
+        # cheaper than running the word regex over every message
+        chunks, forms = self._chunks, self._forms
+        stems = []
+        for chunk in text_lower.split():
+            # One lookup: another thread may clear the memo between a check and a read
+            cached = chunks.get(chunk)
+            stems += cached if cached is not None else self._stem_chunk(chunk)
+        if self._max_words == 1:
+            hits = forms.keys() & stems
+        else:
+            candidates = set(stems)
+            for n in range(2, self._max_words + 1):
+                candidates.update(" ".join(stems[i:i + n]) for i in range(len(stems) - n + 1))
+            hits = [form for form in candidates if form in forms]
+        if not hits:
+            return []
+
+        hits = frozenset(hits)
+        results = self._results.get(hits)
+        if results is None:
+            if len(self._results) >= STEM_CACHE_SIZE:
+                self._results.clear()
+            results = self._results[hits] = self._rank(hits)
+        return [{"intent": intent, "keywords_matched": list(keywords), "score": score}
+                for intent, keywords, score in results]
+
+    def _rank(self, hits):
+        # (intent, keywords, score) in vocabulary order for a set of matched stemmed forms
+        found = set().union(*(self._forms[form] for form in hits))
+        placements = sorted(placement for keyword in found for placement in self._placements[keyword])
+        by_intent = {}
+        for _, keyword_index, intent in placements:
+            by_intent.setdefault(intent, []).append(keyword_index)
+
+        results = []
+        for intent, keyword_indexes in by_intent.items():
+            matched = [self._weighted[intent][i] for i in keyword_indexes]
+            results.append((intent, tuple(kw for kw, _ in matched), sum(weight for _, weight in matched)))
+        return tuple(results)
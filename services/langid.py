@@ -0,0 +1,265 @@
+"""
+Offline language identification with a character n-gram model
+
+A multinomial naive Bayes classifier over character 1- to 3-grams of the
+letters in a text. The model is one small .npz file of n-grams and float16
+log-probabilities, loaded once through the model registry, so detection
+needs no network access and costs tens of microseconds per message.
+
+Rebuild the bundled model from data/langid/train/<language>.txt with:
+    python -m services.langid --build
+"""
+import argparse
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from services import model_registry
+
+# Compiled n-gram model loaded by load_language_identifier
+LANGUAGE_PROFILES_PATH = os.getenv("LANGUAGE_PROFILES_PATH", "data/language_profiles.npz")
+# One <language>.txt file of sample text per language, read by --build
+LANGUAGE_TRAINING_DIR = "data/langid/train"
+
+DEFAULT_ORDERS = (1, 2, 3)
+# N-grams kept per language and order; the rest fall back to the unseen log-probability
+DEFAULT_TOP_K = 3000
+# Add-alpha smoothing of the n-gram counts
+DEFAULT_ALPHA = 0.5
+# Mean per-n-gram log-likelihood gaps are multiplied by this before the softmax.
+# Naive Bayes posteriors over a whole message are almost always 0 or 1; scaling
+# the per-n-gram average instead gives confidences that drop on short or mixed text.
+CONFIDENCE_SCALE = 12.0
+
+# Runs of letters; digits, punctuation and underscores separate words
+_LETTERS_RE = re.compile(r"[^\W\d_]+")
+
+
+def _normalize(text):
+    """Lowercase letter runs joined by single spaces and padded with spaces, or "" if there are none."""
+    words = _LETTERS_RE.findall(text.lower())
+    return f" {' '.join(words)} " if words else ""
+
+
+def _ngrams(normalized, orders):
+    for n in orders:
+        for i in range(len(normalized) - n + 1):
+            yield n, normalized[i:i + n]
+
+
+class LanguageIdentifier:
+    """
+    Naive Bayes language identifier over character n-grams
+
+    Every known n-gram maps to a row of per-language log-probabilities; an
+    unknown n-gram of order n maps to that order's unseen row. A text is
+    scored by summing the rows of its n-grams, so the cost depends on the
+    text length and the number of languages, not on the vocabulary size.
+
+    Args:
+        languages (list): Language codes, one per column
+        ngrams (list): Known n-grams, one per row of logprobs
+        logprobs (numpy.ndarray): (len(ngrams), len(languages)) log-probabilities
+        unseen (numpy.ndarray): (len(orders), len(languages)) log-probabilities of unknown n-grams
+        orders (tuple): N-gram orders, matching the rows of unseen
+    """
+
+    def __init__(self, languages, ngrams, logprobs, unseen, orders=DEFAULT_ORDERS):
+        self.languages = [str(language) for language in languages]
+        self.orders = tuple(int(n) for n in orders)
+        # Scores are summed in float32 whatever the storage dtype
+        self._table = np.vstack([np.asarray(logprobs, dtype=np.float32), np.asarray(unseen, dtype=np.float32)])
+        self._rows = {str(ngram): row for row, ngram in enumerate(ngrams)}
+        self._unseen_rows = {n: len(self._rows) + i for i, n in enumerate(self.orders)}
+
+    @classmethod
+    def train(cls, corpus, orders=DEFAULT_ORDERS, top_k=DEFAULT_TOP_K, alpha=DEFAULT_ALPHA):
+        """
+        Estimate the model from sample text
+
+        Args:
+            corpus (dict): Mapping of language code -> sample text
+            orders (tuple): N-gram orders
+            top_k (int): Most frequent n-grams kept per language and order
+            alpha (float): Add-alpha smoothing
+
+        Returns:
+            LanguageIdentifier: Trained identifier
+        """
+        languages = sorted(corpus)
+        counts = {language: Counter(_ngrams(_normalize(corpus[language]), orders)) for language in languages}
+
+        kept = set()
+        for language in languages:
+            for n in orders:
+                grams = Counter({gram: count for (order, gram), count in counts[language].items() if order == n})
+                kept.update((n, gram) for gram, _ in grams.most_common(top_k))
+        kept = sorted(kept)
+
+        # Smoothed over the kept n-grams of each order plus one bucket for everything else
+        vocabulary = Counter(n for n, _ in kept)
+        logprobs = np.empty((len(kept), len(languages)), dtype=np.float64)
+        unseen = np.empty((len(orders), len(languages)), dtype=np.float64)
+        for column, language in enumerate(languages):
+            language_counts = counts[language]
+            totals = Counter()
+            for (n, _), count in language_counts.items():
+                totals[n] += count
+            denominators = {n: np.log(totals[n] + alpha * (vocabulary[n] + 1)) for n in orders}
+            for i, n in enumerate(orders):
+                unseen[i, column] = np.log(alpha) - denominators[n]
+            for row, key in enumerate(kept):
+                logprobs[row, column] = np.log(language_counts.get(key, 0) + alpha) - denominators[key[0]]
+
+        return cls(languages, [gram for _, gram in kept], logprobs, unseen, orders)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Load a model saved by save()
+
+        Args:
+            path (str): Path to the .npz model
+
+        Returns:
+            LanguageIdentifier: Loaded identifier
+        """
+        with np.load(path) as data:
+            return cls(data["languages"].tolist(), data["ngrams"].tolist(), data["logprobs"],
+                       data["unseen"], data["orders"].tolist())
+
+    def save(self, path):
+        """Write the model as a compressed .npz of n-grams and float16 log-probabilities."""
+        ngrams = sorted(self._rows, key=self._rows.get)
+        known = len(ngrams)
+        np.savez_compressed(
+            path,
+            languages=np.array(self.languages),
+            ngrams=np.array(ngrams),
+            logprobs=self._table[:known].astype(np.float16),
+            unseen=self._table[known:].astype(np.float16),
+            orders=np.array(self.orders),
+        )
+
+    def _feature_rows(self, text):
+        # Hot path: one list comprehension per order instead of going through _ngrams
+        normalized = _normalize(text)
+        get = self._rows.get
+        features = []
+        for n, unseen in self._unseen_rows.items():
+            features += [get(normalized[i:i + n], unseen) for i in range(len(normalized) - n + 1)]
+        return features
+
+    def _result(self, scores, count):
+        # Softmax over the mean per-n-gram log-likelihood, see CONFIDENCE_SCALE
+        logits = scores * (CONFIDENCE_SCALE / count)
+        logits -= logits.max(axis=-1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=-1, keepdims=True)
+        return probabilities
+
+    def scores(self, text):
+        """
+        Confidence for every language
+
+        Args:
+            text (str): Input text
+
+        Returns:
+            dict: language -> confidence, summing to 1; empty if the text has no letters
+        """
+        rows = self._feature_rows(text)
+        if not rows:
+            return {}
+        probabilities = self._result(self._table[rows].sum(axis=0), len(rows))
+        return dict(zip(self.languages, probabilities.tolist()))
+
+    def detect(self, text):
+        """
+        Most likely language of a text
+
+        Args:
+            text (str): Input text
+
+        Returns:
+            tuple: (language code, confidence), or (None, 0.0) if the text has no letters
+        """
+        rows = self._feature_rows(text)
+        if not rows:
+            return None, 0.0
+        probabilities = self._result(self._table[rows].sum(axis=0), len(rows))
+        best = int(probabilities.argmax())
+        return self.languages[best], float(probabilities[best])
+
+    def detect_batch(self, texts):
+        """
+        Most likely language of many texts, scored in one vectorized pass
+
+        Args:
+            texts (list): Input texts
+
+        Returns:
+            list: (language code, confidence) per text, (None, 0.0) for texts without letters
+        """
+        results = [(None, 0.0)] * len(texts)
+        indices, offsets, counts, flat = [], [], [], []
+        for index, text in enumerate(texts):
+            rows = self._feature_rows(text)
+            if rows:
+                indices.append(index)
+                offsets.append(len(flat))
+                counts.append(len(rows))
+                flat.extend(rows)
+        if not indices:
+            return results
+
+        scores = np.add.reduceat(self._table[flat], offsets, axis=0)
+        probabilities = self._result(scores, np.array(counts, dtype=np.float32)[:, None])
+        best = probabilities.argmax(axis=1)
+        confidences = probabilities[np.arange(len(indices)), best]
+        for index, language, confidence in zip(indices, best.tolist(), confidences.tolist()):
+            results[index] = (self.languages[language], confidence)
+        return results
+
+
+def load_language_identifier(path=LANGUAGE_PROFILES_PATH):
+    """Return the shared language identifier loaded from a model file."""
+    return model_registry.get_model(("language_identifier", path), lambda: LanguageIdentifier.from_file(path))
+
+
+def read_training_corpus(directory=LANGUAGE_TRAINING_DIR):
+    """Read {language: text} from the <language>.txt files of a directory."""
+    corpus = {}
+    for name in sorted(os.listdir(directory)):
+        language, extension = os.path.splitext(name)
+        if extension == ".txt":
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                corpus[language] = f.read()
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--build", action="store_true", help="train the model and write it to --output")
+    parser.add_argument("--train-dir", default=LANGUAGE_TRAINING_DIR)
+    parser.add_argument("--output", default=LANGUAGE_PROFILES_PATH)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    parser.add_argument("text", nargs="*", help="texts to identify with the model at --output")
+    args = parser.parse_args(argv)
+
+    if args.build:
+        identifier = LanguageIdentifier.train(read_training_corpus(args.train_dir), top_k=args.top_k, alpha=args.alpha)
+        identifier.save(args.output)
+        print(f"{len(identifier.languages)} languages, {len(identifier._rows)} n-grams, "
+              f"{os.path.getsize(args.output) / 1024:.0f} KiB -> {args.output}")
+    if args.text:
+        identifier = LanguageIdentifier.from_file(args.output)
+        for text, (language, confidence) in zip(args.text, identifier.detect_batch(args.text)):
+            print(f"{language or '-'}\t{confidence:.3f}\t{text}")
+
+
+if __name__ == "__main__":
+    main()
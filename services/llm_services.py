@@ -0,0 +1,190 @@
+import functools
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+from services import http_client, model_registry, telemetry
+from services.metrics import Histogram
+
+load_dotenv()
+
+LLM_MODEL = os.getenv("LLM_MODEL", "groq/llama3-8b-8192")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_PROVIDER = "groq"
+# Set LLM_API_BASE to send completions to another OpenAI-compatible server,
+# e.g. a local fake during tests (with LLM_MODEL="openai/<name>")
+LLM_API_BASE = os.getenv("LLM_API_BASE")
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") != "0"
+# Completions generating at once, blocking or streamed. A slot is held until the
+# whole response has been generated, not just while the request is sent.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# litellm providers whose handler takes a litellm HTTPHandler as client=
+_HTTP_HANDLER_PROVIDERS = ("groq", "openai_like")
+
+time_to_first_token = Histogram()
+generation_time = Histogram()
+_generation_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+
+def _load_litellm():
+    import litellm
+    return litellm
+
+
+def load_litellm():
+    """
+    Return the litellm module, importing it on first use
+
+    litellm takes seconds to import, so it is loaded through the model
+    registry (and its warm-up) rather than when this module is imported.
+    """
+    return model_registry.get_model(("litellm",), _load_litellm)
+
+
+def _load_http_handler():
+    import httpx
+    from litellm.llms.custom_httpx.http_handler import HTTPHandler
+
+    # Keep-alive connection pool shared by every completion call. litellm's
+    # OpenAI-compatible providers (Groq included) open a fresh HTTPHandler per
+    # call unless one is passed as client=; litellm.client_session is not used.
+    return HTTPHandler(
+        timeout=LLM_TIMEOUT,
+        client=httpx.Client(
+            limits=httpx.Limits(
+                max_connections=http_client.POOL_SIZE,
+                max_keepalive_connections=http_client.POOL_SIZE,
+            ),
+            timeout=LLM_TIMEOUT,
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _takes_http_handler(model):
+    # Only these providers accept an HTTPHandler as client=; the OpenAI SDK
+    # path (e.g. "openai/<name>" against a local fake) expects an OpenAI client
+    _, provider, _, _ = load_litellm().get_llm_provider(model)
+    return provider in _HTTP_HANDLER_PROVIDERS
+
+
+def load_http_handler():
+    """Return the shared litellm HTTP handler holding the completion connection pool."""
+    return model_registry.get_model(("litellm_http_handler",), _load_http_handler)
+
+
+def _retryable_errors(litellm):
+    return (
+        litellm.RateLimitError,
+        litellm.ServiceUnavailableError,
+        litellm.InternalServerError,
+        litellm.APIConnectionError,
+        litellm.Timeout,
+    )
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    return http_client.parse_retry_after(headers.get("retry-after"))
+
+
+def _completion(messages, model, **kwargs):
+    kwargs.setdefault("timeout", LLM_TIMEOUT)
+    if LLM_API_BASE:
+        kwargs.setdefault("api_base", LLM_API_BASE)
+
+    litellm = load_litellm()
+    if "client" not in kwargs and _takes_http_handler(model):
+        kwargs["client"] = load_http_handler()
+    retryable_errors = _retryable_errors(litellm)
+
+    def attempt():
+        try:
+            return litellm.completion(model=model, messages=messages, **kwargs)
+        except retryable_errors as e:
+            raise http_client.RetryableError(cause=e, retry_after=_retry_after(e))
+
+    # The generation slot replaces the per-host limit, which would only cover opening a stream
+    return http_client.call_with_retries(LLM_PROVIDER, None, attempt, deadline=LLM_TIMEOUT)
+
+
+@telemetry.instrument("llm.completion")
+def complete(messages, model=LLM_MODEL, **kwargs):
+    """
+    Run a chat completion under the shared retry and circuit-breaker policy
+
+    Waits for one of the LLM_MAX_CONCURRENCY generation slots. Use
+    stream_complete to stream.
+
+    Args:
+        messages (list): Chat messages in OpenAI format
+        model (str): litellm model name
+        **kwargs: Extra completion parameters (temperature, max_tokens...)
+
+    Returns:
+        ModelResponse: litellm completion response
+    """
+    with _generation_slots:
+        return _completion(messages, model, **kwargs)
+
+
+@telemetry.instrument("llm.stream")
+def stream_complete(messages, model=LLM_MODEL, timings=None, **kwargs):
+    """
+    Stream a chat completion as text chunks
+
+    Time to first token and total generation time are recorded separately in
+    the module histograms. Only opening the stream is retried; a failure
+    mid-stream is raised to the caller. A generation slot is held, as for
+    complete, until the stream ends or the generator is closed.
+
+    Args:
+        messages (list): Chat messages in OpenAI format
+        model (str): litellm model name
+        timings (dict): Optional dict filled with "time_to_first_token" and
+            "generation_time" in seconds
+        **kwargs: Extra completion parameters (temperature, max_tokens...)
+
+    Yields:
+        str: Text deltas in arrival order
+    """
+    start = time.perf_counter()
+    with _generation_slots:
+        stream = _completion(messages, model, stream=True, **kwargs)
+
+        first_token_at = None
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter() - start
+                time_to_first_token.observe(first_token_at)
+                if timings is not None:
+                    timings["time_to_first_token"] = first_token_at
+            yield delta
+
+    total = time.perf_counter() - start
+    generation_time.observe(total)
+    if timings is not None:
+        timings["generation_time"] = total
+
+
+def timing_stats():
+    """Return time-to-first-token and total generation time percentiles."""
+    stats = {}
+    for name, histogram in (("time_to_first_token", time_to_first_token), ("generation_time", generation_time)):
+        snapshot = histogram.snapshot()
+        snapshot.pop("buckets")
+        stats[name] = snapshot
+    return stats
+
+
+def _collect_metrics():
+    yield "llm_time_to_first_token_seconds", {}, time_to_first_token
+    yield "llm_generation_seconds", {}, generation_time
+
+
+telemetry.register_collector(_collect_metrics)
@@ -0,0 +1,174 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from services import telemetry
+from services.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = int(os.getenv("MEMORY_WRITE_BATCH_SIZE", "32"))
+WRITE_FLUSH_INTERVAL = float(os.getenv("MEMORY_WRITE_FLUSH_INTERVAL", "0.5"))
+WRITE_QUEUE_SIZE = int(os.getenv("MEMORY_WRITE_QUEUE_SIZE", "1000"))
+
+_ADD = "add"
+_DELETE = "delete"
+_BARRIER = "barrier"
+
+
+class MemoryWriteQueue:
+    """
+    Background write-behind queue for ConversationMemory indexing
+
+    Pending writes are coalesced into one batched SentenceTransformer.encode
+    and one Chroma add per collection, followed by one batched delete. A batch
+    is flushed when it reaches batch_size or flush_interval has passed since
+    its first write. The queue is bounded: submitters block when it is full.
+
+    Args:
+        batch_size (int): Maximum number of writes per flush
+        flush_interval (float): Maximum seconds a write waits before being flushed
+        max_queue (int): Maximum number of pending writes
+    """
+
+    def __init__(self, batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_FLUSH_INTERVAL, max_queue=WRITE_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopped = threading.Event()
+        self.flush_latency = Histogram()
+        self._counts = {"flushes": 0, "items_written": 0, "errors": 0}
+        self._counts_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self._thread.start()
+
+    def submit_add(self, collection, embedder, conv_id, document, metadata):
+        """Queue a document to be embedded and added to a collection."""
+        self._queue.put((_ADD, collection, embedder, conv_id, document, metadata))
+
+    def submit_delete(self, collection, ids):
+        """Queue ids to be deleted from a collection after any pending adds."""
+        self._queue.put((_DELETE, collection, None, list(ids), None, None))
+
+    def _run(self):
+        while not (self._stopped.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] != _BARRIER:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            writes = [item for item in batch if item[0] != _BARRIER]
+            try:
+                if writes:
+                    self._write(writes)
+            except Exception as e:
+                logger.exception("Conversation memory write failed: %s", e)
+                with self._counts_lock:
+                    self._counts["errors"] += 1
+            finally:
+                for item in batch:
+                    if item[0] == _BARRIER:
+                        item[1].set()
+                    self._queue.task_done()
+
+    @telemetry.instrument("memory.write_batch")
+    def _write(self, batch):
+        start = time.perf_counter()
+
+        # Group by target so each collection gets one encode and one add
+        adds, deletes = {}, {}
+        for kind, collection, embedder, payload, document, metadata in batch:
+            if kind == _ADD:
+                group = adds.setdefault((id(collection), id(embedder)), (collection, embedder, [], [], []))
+                group[2].append(payload)
+                group[3].append(document)
+                group[4].append(metadata)
+            else:
+                deletes.setdefault(id(collection), (collection, []))[1].extend(payload)
+
+        for collection, embedder, ids, documents, metadatas in adds.values():
+            embeddings = embedder.encode(documents, batch_size=len(documents))
+            collection.add(
+                ids=ids,
+                embeddings=embeddings.tolist(),
+                documents=documents,
+                metadatas=metadatas
+            )
+
+        # Deletes run after adds, so evicting a not-yet-flushed entry still works
+        for collection, ids in deletes.values():
+            collection.delete(ids=list(dict.fromkeys(ids)))
+
+        self.flush_latency.observe(time.perf_counter() - start)
+        with self._counts_lock:
+            self._counts["flushes"] += 1
+            self._counts["items_written"] += len(batch)
+
+    def flush(self, timeout=None):
+        """
+        Block until every write queued so far has been applied
+
+        Later writes from other sessions do not extend the wait.
+
+        Args:
+            timeout (float): Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: True if the earlier writes were applied within the timeout
+        """
+        done = threading.Event()
+        self._queue.put((_BARRIER, done, None, None, None, None))
+        return done.wait(timeout)
+
+    def close(self):
+        """Flush pending writes and stop the background thread."""
+        self._stopped.set()
+        self._thread.join()
+
+    def stats(self):
+        """Return queue depth, flush counts and flush latency percentiles."""
+        latency = self.flush_latency.snapshot()
+        with self._counts_lock:
+            counts = dict(self._counts)
+        return {
+            "queue_depth": self._queue.qsize(),
+            **counts,
+            "flush_latency_p50": latency["p50"],
+            "flush_latency_p99": latency["p99"],
+        }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_memory_writer():
+    """Return the process-wide write queue, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = MemoryWriteQueue()
+            atexit.register(_writer.close)
+            telemetry.register_collector(_collect_metrics)
+        return _writer
+
+
+def _collect_metrics():
+    yield "memory_write_flush_seconds", {}, _writer.flush_latency
+    stats = _writer.stats()
+    for name in ("queue_depth", "flushes", "items_written", "errors"):
+        yield f"memory_write_{name}", {}, stats[name]
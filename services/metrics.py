@@ -0,0 +1,74 @@
+import bisect
+import threading
+
+# Latency bucket upper bounds in seconds, Prometheus style
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram for latency observations
+
+    Percentiles are estimated from the bucket upper bounds, which is accurate
+    enough to tell a 50 ms upstream from a 2 s one at p99.
+
+    Args:
+        buckets (tuple): Sorted bucket upper bounds in seconds
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            self._max = max(self._max, value)
+
+    def percentile(self, q):
+        """
+        Estimate a percentile
+
+        Args:
+            q (float): Percentile between 0 and 100
+
+        Returns:
+            float: Upper bound of the bucket holding the percentile, or the
+                observed maximum for the overflow bucket
+        """
+        with self._lock:
+            if not self._count:
+                return 0.0
+            rank = q / 100 * self._count
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank and count:
+                    return self.buckets[index] if index < len(self.buckets) else self._max
+            return self._max
+
+    def snapshot(self):
+        """Return count, sum, max, p50/p95/p99 and cumulative bucket counts."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count, maximum = self._sum, self._count, self._max
+        cumulative, running = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {
+            "count": count,
+            "sum": total,
+            "max": maximum,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": cumulative,
+        }
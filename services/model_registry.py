@@ -0,0 +1,316 @@
+import gc
+import logging
+import os
+import threading
+import time
+
+from services import telemetry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPACY_MODEL = "en_core_web_sm"
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Components NLPService never reads; NER only needs the tokenizer and its own tok2vec
+NER_ONLY_DISABLE = ("lemmatizer", "parser")
+
+# Embedding inference backend: "torch" (float32 PyTorch), "torch-int8" (Linear layers
+# dynamically quantized to int8), "onnx" or "onnx-int8" (ONNX Runtime, needs
+# sentence-transformers[onnx])
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Quantized ONNX weights published with the model; model_qint8_avx512_vnni.onnx suits recent Xeons
+EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+# Models are shared by every Streamlit session in the process. The registry
+# lock only guards the dictionaries; each key gets its own load lock so a slow
+# SentenceTransformer load does not block a spaCy lookup.
+_registry_lock = threading.Lock()
+_models = {}
+_load_locks = {}
+_load_times = {}
+_warm_up_thread = None
+# Lock files of the persistent Chroma directories opened by this process, held until exit
+_store_locks = {}
+
+
+def get_model(key, loader):
+    """
+    Return the model registered under a key, loading it on first use
+
+    Args:
+        key (tuple): Registry key identifying the model and its options
+        loader (callable): Zero-argument function that loads the model
+
+    Returns:
+        object: The shared model instance
+    """
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+
+    with load_lock:
+        model = _models.get(key)
+        if model is not None:
+            return model
+
+        start = time.perf_counter()
+        model = loader()
+        elapsed = time.perf_counter() - start
+
+        with _registry_lock:
+            _models[key] = model
+            _load_times[key] = elapsed
+        logger.info("Loaded %s in %.2fs", key, elapsed)
+        return model
+
+
+def evict(key):
+    """
+    Drop a model from the registry so its memory can be reclaimed
+
+    Args:
+        key (tuple): Registry key of the model to drop
+
+    Returns:
+        bool: True if a model was evicted
+    """
+    with _registry_lock:
+        model = _models.pop(key, None)
+        _load_times.pop(key, None)
+    if model is None:
+        return False
+    del model
+    gc.collect()
+    logger.info("Evicted %s", key)
+    return True
+
+
+def swap_model(old_key, new_key, loader):
+    """
+    Load a replacement model and evict the one it supersedes
+
+    Args:
+        old_key (tuple): Registry key of the model being replaced
+        new_key (tuple): Registry key of the replacement model
+        loader (callable): Zero-argument function that loads the replacement
+
+    Returns:
+        object: The replacement model instance
+    """
+    model = get_model(new_key, loader)
+    if old_key != new_key:
+        evict(old_key)
+    return model
+
+
+def loaded_models():
+    """Return the keys of every model currently held by the registry."""
+    with _registry_lock:
+        return list(_models)
+
+
+def load_times():
+    """Return the load time in seconds of every registered model."""
+    with _registry_lock:
+        return dict(_load_times)
+
+
+def _key_labels(key):
+    # ("spacy", "en_core_web_sm", ("lemmatizer", "parser")) -> model="spacy", variant="en_core_web_sm:lemmatizer,parser"
+    parts = [",".join(map(str, part)) if isinstance(part, tuple) else str(part) for part in key[1:] if part is not None]
+    return {"model": str(key[0]), "variant": ":".join(part for part in parts if part)}
+
+
+def _collect_metrics():
+    for key, seconds in load_times().items():
+        yield "model_load_seconds", _key_labels(key), seconds
+    yield "models_loaded", {}, len(loaded_models())
+
+
+telemetry.register_collector(_collect_metrics)
+
+
+def _load_spacy(name, disable):
+    import spacy
+
+    try:
+        return spacy.load(name, disable=list(disable))
+    except OSError:
+        print("Downloading spaCy model... Please wait.")
+        spacy.cli.download(name)
+        return spacy.load(name, disable=list(disable))
+
+
+def get_spacy_model(name=DEFAULT_SPACY_MODEL, disable=()):
+    """
+    Return a shared spaCy pipeline
+
+    Args:
+        name (str): spaCy model package name
+        disable (tuple): Pipeline components to disable
+
+    Returns:
+        spacy.Language: Loaded pipeline
+    """
+    disable = tuple(sorted(disable))
+    return get_model(("spacy", name, disable), lambda: _load_spacy(name, disable))
+
+
+def _load_sentence_transformer(name, backend):
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {', '.join(EMBEDDING_BACKENDS)}")
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(name)
+    if backend == "torch-int8":
+        import torch
+
+        model = SentenceTransformer(name, device="cpu")
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    if backend == "onnx":
+        return SentenceTransformer(name, backend="onnx")
+    return SentenceTransformer(name, backend="onnx", model_kwargs={"file_name": EMBEDDING_ONNX_INT8_FILE})
+
+
+def sentence_transformer_key(name=DEFAULT_EMBEDDING_MODEL, backend=None):
+    """Return the registry key of an embedding model on a backend (EMBEDDING_BACKEND by default)."""
+    return ("sentence_transformer", name, backend or EMBEDDING_BACKEND)
+
+
+def embedding_model_id(name=DEFAULT_EMBEDDING_MODEL, backend=None):
+    """
+    Return the name embeddings of a model are cached under
+
+    Quantized backends produce slightly different vectors, so they are cached
+    apart from the float32 model, which keeps its plain name.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    return name if backend == "torch" else f"{name}:{backend}"
+
+
+def get_sentence_transformer(name=DEFAULT_EMBEDDING_MODEL, backend=None):
+    """
+    Return a shared SentenceTransformer model
+
+    Args:
+        name (str): SentenceTransformer model name
+        backend (str): One of EMBEDDING_BACKENDS, defaults to EMBEDDING_BACKEND
+
+    Returns:
+        SentenceTransformer: Loaded embedding model
+    """
+    backend = backend or EMBEDDING_BACKEND
+    return get_model(sentence_transformer_key(name, backend), lambda: _load_sentence_transformer(name, backend))
+
+
+def swap_sentence_transformer(old_name, new_name, backend=None):
+    """
+    Replace a shared SentenceTransformer with another one
+
+    This is process-wide: sessions still holding the old model keep it alive,
+    and their stored vectors are not comparable with the new model's. Switch a
+    single conversation with ConversationMemory.set_embedding_model instead.
+
+    Args:
+        old_name (str): Model currently in use
+        new_name (str): Model to load in its place
+        backend (str): One of EMBEDDING_BACKENDS, defaults to EMBEDDING_BACKEND
+
+    Returns:
+        SentenceTransformer: The replacement model
+    """
+    backend = backend or EMBEDDING_BACKEND
+    return swap_model(
+        sentence_transformer_key(old_name, backend),
+        sentence_transformer_key(new_name, backend),
+        lambda: _load_sentence_transformer(new_name, backend),
+    )
+
+
+def get_chroma_client(persist_directory=None):
+    """
+    Return a shared Chroma client
+
+    Args:
+        persist_directory (str): On-disk store location, or None for an in-process store
+
+    Returns:
+        chromadb.ClientAPI: Chroma client
+    """
+    def load():
+        import chromadb
+        if persist_directory:
+            _lock_store_directory(persist_directory)
+            return chromadb.PersistentClient(path=persist_directory)
+        return chromadb.Client()
+
+    return get_model(("chroma", persist_directory), load)
+
+
+def _lock_store_directory(path):
+    """
+    Take an exclusive lock on a Chroma store directory for the life of the process
+
+    A PersistentClient directory must only be opened by one process; a second
+    process (another API worker, or Streamlit next to the API) fails here
+    instead of corrupting the store.
+    """
+    try:
+        import fcntl
+    except ImportError:  # Windows: no advisory locks, rely on the documented single process
+        return
+    if path in _store_locks:
+        return
+    os.makedirs(path, exist_ok=True)
+    lock_file = open(os.path.join(path, ".process.lock"), "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        raise RuntimeError(
+            f"Chroma store {path!r} is already open in another process; run a single process per store"
+        ) from None
+    _store_locks[path] = lock_file
+
+
+def warm_up(spacy_model=DEFAULT_SPACY_MODEL, embedding_model=DEFAULT_EMBEDDING_MODEL, chroma_directory=None,
+            extra_loaders=()):
+    """
+    Start loading the default models in a background thread
+
+    Safe to call on every Streamlit rerun: only the first call starts a thread.
+
+    Args:
+        spacy_model (str): spaCy model to preload, or None to skip it
+        embedding_model (str): SentenceTransformer model to preload, or None to skip it
+        chroma_directory (str): Persistent Chroma store to open, or None for in-process
+        extra_loaders (tuple): Further zero-argument loaders, run after the memory models
+
+    Returns:
+        threading.Thread: The warm-up thread
+    """
+    global _warm_up_thread
+
+    def run():
+        # Conversation memory is needed by both pages, spaCy only by the chatbot
+        loaders = [lambda: get_chroma_client(chroma_directory)]
+        if embedding_model:
+            loaders.append(lambda: get_sentence_transformer(embedding_model))
+        loaders.extend(extra_loaders)
+        if spacy_model:
+            loaders.append(lambda: get_spacy_model(spacy_model, disable=NER_ONLY_DISABLE))
+        for load in loaders:
+            try:
+                load()
+            except Exception as e:
+                logger.warning("Model warm-up failed: %s", e)
+
+    with _registry_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=run, name="model-warm-up", daemon=True)
+            _warm_up_thread.start()
+        return _warm_up_thread
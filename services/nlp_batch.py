@@ -0,0 +1,76 @@
+"""
+Offline NLP analysis of exported chat logs
+
+Reads one message per line and writes one JSON result per line, streaming
+both ends so multi-million-line logs run in bounded memory.
+
+Usage:
+    python -m services.nlp_batch chats.txt --task analyze --output results.jsonl
+    cat chats.txt | python -m services.nlp_batch - --task embed --batch-size 128
+"""
+import argparse
+import json
+import sys
+
+from services.nlp_services import NLPService
+
+
+def read_lines(stream):
+    for line in stream:
+        yield line.rstrip("\n")
+
+
+def run(task, texts, service, batch_size, n_process):
+    """
+    Run one batch task over an iterable of texts
+
+    Args:
+        task (str): One of "analyze", "entities", "sentiment", "language" or "embed"
+        texts (Iterable[str]): Input texts
+        service (NLPService): Service used for the analysis
+        batch_size (int): Texts per spaCy or SentenceTransformer batch
+        n_process (int): spaCy worker processes
+
+    Yields:
+        dict: One JSON-serialisable result per input text
+    """
+    if task == "analyze":
+        yield from service.analyze_batch(texts, batch_size=batch_size, n_process=n_process)
+    elif task == "entities":
+        yield from service.extract_entities_batch(texts, batch_size=batch_size, n_process=n_process)
+    elif task == "sentiment":
+        yield from service.analyze_sentiment_batch(texts)
+    elif task == "language":
+        yield from service.identify_language_batch(texts)
+    elif task == "embed":
+        for vectors in service.embed_batch(texts, batch_size=batch_size):
+            for vector in vectors:
+                yield {"embedding": vector.tolist()}
+    else:
+        raise ValueError(f"Unknown task: {task}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="text file with one message per line, or - for stdin")
+    parser.add_argument("--task", choices=["analyze", "entities", "sentiment", "language", "embed"], default="analyze")
+    parser.add_argument("--output", help="JSON lines output file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        service = NLPService()
+        for result in run(args.task, read_lines(source), service, args.batch_size, args.n_process):
+            sink.write(json.dumps(result) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from services import model_registry, telemetry
+from services.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for NLP analysis and embeddings; 0 runs them in the calling thread
+NLP_WORKERS = int(os.getenv("NLP_WORKERS", "0"))
+NLP_POOL_BATCH_SIZE = int(os.getenv("NLP_POOL_BATCH_SIZE", "32"))
+NLP_POOL_BATCH_WAIT = float(os.getenv("NLP_POOL_BATCH_WAIT", "0.005"))
+NLP_POOL_QUEUE_SIZE = int(os.getenv("NLP_POOL_QUEUE_SIZE", "512"))
+
+_ANALYZE = "analyze"
+_EMBED = "embed"
+
+
+# Functions below run in the worker processes; each worker loads its models once
+
+def _worker_nlp(spacy_model):
+    from services.nlp_services import NLPService
+
+    return model_registry.get_model(("nlp_service", spacy_model), lambda: NLPService(spacy_model))
+
+
+def _init_worker(spacy_model, embedding_model):
+    for load in (lambda: _worker_nlp(spacy_model), lambda: model_registry.get_sentence_transformer(embedding_model)):
+        try:
+            load()
+        except Exception as e:
+            logger.warning("NLP worker warm-up failed: %s", e)
+
+
+def _ping():
+    return os.getpid()
+
+
+def _analyze_batch(spacy_model, texts):
+    return list(_worker_nlp(spacy_model).analyze_batch(texts))
+
+
+def _embed_batch(embedding_model, normalize, texts):
+    embedder = model_registry.get_sentence_transformer(embedding_model)
+    return np.asarray(
+        embedder.encode(texts, batch_size=len(texts), normalize_embeddings=normalize, convert_to_numpy=True),
+        dtype=np.float32,
+    )
+
+
+class NLPWorkerPool:
+    """
+    Warm worker processes for spaCy/TextBlob analysis and sentence embeddings
+
+    Requests from every session go into one bounded queue. A dispatcher
+    thread groups them into batches of up to batch_size requests (waiting at
+    most batch_wait seconds to fill one) and sends each batch to a worker,
+    which runs it through nlp.pipe or one encode call. At most two batches
+    per worker are in flight; beyond that the queue fills and submitters
+    block, so load sheds back to the callers instead of piling up.
+
+    Workers are started with "spawn", since the app process runs threads,
+    and each preloads the spaCy and SentenceTransformer models.
+
+    Args:
+        workers (int): Number of worker processes
+        batch_size (int): Maximum requests per batch
+        batch_wait (float): Maximum seconds a request waits for its batch to fill
+        max_queue (int): Maximum pending requests
+        spacy_model (str): spaCy model the workers analyze with
+        embedding_model (str): SentenceTransformer the workers preload
+    """
+
+    def __init__(self, workers=NLP_WORKERS, batch_size=NLP_POOL_BATCH_SIZE, batch_wait=NLP_POOL_BATCH_WAIT,
+                 max_queue=NLP_POOL_QUEUE_SIZE, spacy_model=model_registry.DEFAULT_SPACY_MODEL,
+                 embedding_model=model_registry.DEFAULT_EMBEDDING_MODEL):
+        if workers < 1:
+            raise ValueError("NLPWorkerPool needs at least one worker")
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.spacy_model = spacy_model
+        self.embedding_model = embedding_model
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._slots = threading.BoundedSemaphore(2 * workers)
+        self._stopped = threading.Event()
+        self._executor_lock = threading.Lock()
+        self._executor = self._start_executor()
+        self.queue_wait = Histogram()
+        self.batch_latency = Histogram()
+        self._counts = {"batches": 0, "requests": 0, "errors": 0, "restarts": 0}
+        self._counts_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="nlp-pool-dispatcher", daemon=True)
+        self._thread.start()
+        telemetry.register_collector(self._collect_metrics)
+
+    def _start_executor(self):
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.spacy_model, self.embedding_model),
+        )
+        # Workers are spawned on demand; one ping each starts them all now
+        for _ in range(self.workers):
+            executor.submit(_ping)
+        return executor
+
+    def submit(self, kind, key, texts, timeout=None):
+        """
+        Queue texts for analysis or embedding
+
+        Args:
+            kind (str): "analyze" or "embed"
+            key (tuple): Batching key, (spacy model,) or (embedding model, normalize)
+            texts (list): Texts of this request
+            timeout (float): Maximum seconds to wait for room in the queue, or None to block
+
+        Returns:
+            concurrent.futures.Future: Resolves to a list of analyses or a float32 matrix
+
+        Raises:
+            queue.Full: If the queue stayed full for timeout seconds
+        """
+        future = Future()
+        if not texts:
+            future.set_result([] if kind == _ANALYZE else np.empty((0, 0), dtype=np.float32))
+            return future
+        self._queue.put((kind, key, list(texts), future, time.perf_counter()), timeout=timeout)
+        return future
+
+    def analyze(self, text, spacy_model=None):
+        """Run NLPService.analyze on one text in a worker."""
+        return self.submit(_ANALYZE, (spacy_model or self.spacy_model,), [text]).result()[0]
+
+    def embed(self, texts, embedding_model=None, normalize_embeddings=False):
+        """Encode texts in a worker and return a float32 matrix, one row per text."""
+        key = (embedding_model or self.embedding_model, bool(normalize_embeddings))
+        return self.submit(_EMBED, key, texts).result()
+
+    def _run(self):
+        while not (self._stopped.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            groups = {}
+            for request in batch:
+                groups.setdefault((request[0], request[1]), []).append(request)
+            for (kind, key), requests in groups.items():
+                self._dispatch(kind, key, requests)
+
+    def _dispatch(self, kind, key, requests):
+        now = time.perf_counter()
+        for request in requests:
+            self.queue_wait.observe(now - request[4])
+        texts = [text for request in requests for text in request[2]]
+        fn = _analyze_batch if kind == _ANALYZE else _embed_batch
+
+        # Blocks while every worker is busy, which in turn fills the queue
+        self._slots.acquire()
+        started = time.perf_counter()
+        with self._executor_lock:
+            executor = self._executor
+        try:
+            future = executor.submit(fn, *key, texts)
+        except BrokenProcessPool as e:
+            self._slots.release()
+            self._restart(executor, e)
+            self._fail(requests, e)
+            return
+        future.add_done_callback(lambda done: self._complete(requests, done, started, executor))
+
+    def _complete(self, requests, done, started, executor):
+        self._slots.release()
+        self.batch_latency.observe(time.perf_counter() - started)
+        with self._counts_lock:
+            self._counts["batches"] += 1
+            self._counts["requests"] += len(requests)
+
+        error = done.exception()
+        if error is not None:
+            if isinstance(error, BrokenProcessPool):
+                self._restart(executor, error)
+            self._fail(requests, error)
+            return
+
+        results = done.result()
+        offset = 0
+        for request in requests:
+            count = len(request[2])
+            request[3].set_result(results[offset:offset + count])
+            offset += count
+
+    def _fail(self, requests, error):
+        with self._counts_lock:
+            self._counts["errors"] += len(requests)
+        for request in requests:
+            request[3].set_exception(error)
+
+    def _restart(self, executor, error):
+        # A worker died (e.g. out of memory); replace the whole pool, once per breakage
+        with self._executor_lock:
+            if self._executor is not executor:
+                return
+            logger.error("NLP worker pool broke, restarting it: %s", error)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._start_executor()
+        with self._counts_lock:
+            self._counts["restarts"] += 1
+
+    def close(self):
+        """Finish queued requests and stop the dispatcher and the workers."""
+        self._stopped.set()
+        self._thread.join()
+        with self._executor_lock:
+            self._executor.shutdown(wait=True)
+
+    def stats(self):
+        """Return queue depth, batch and request counts, and queue wait and batch latency percentiles."""
+        wait = self.queue_wait.snapshot()
+        latency = self.batch_latency.snapshot()
+        with self._counts_lock:
+            counts = dict(self._counts)
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            **counts,
+            "mean_batch_size": counts["requests"] / counts["batches"] if counts["batches"] else 0.0,
+            "queue_wait_p99": wait["p99"],
+            "batch_latency_p50": latency["p50"],
+            "batch_latency_p99": latency["p99"],
+        }
+
+    def _collect_metrics(self):
+        yield "nlp_pool_queue_wait_seconds", {}, self.queue_wait
+        yield "nlp_pool_batch_seconds", {}, self.batch_latency
+        yield "nlp_pool_queue_depth", {}, self._queue.qsize()
+        with self._counts_lock:
+            counts = dict(self._counts)
+        for name, value in counts.items():
+            yield f"nlp_pool_{name}", {}, value
+
+
+class PooledEmbedder:
+    """
+    SentenceTransformer stand-in that encodes in the worker pool
+
+    Args:
+        pool (NLPWorkerPool): Pool the texts are sent to
+        model_name (str): SentenceTransformer model the workers use
+    """
+
+    def __init__(self, pool, model_name):
+        self.pool = pool
+        self.model_name = model_name
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        vectors = self.pool.embed([sentences] if single else list(sentences), self.model_name, normalize_embeddings)
+        return vectors[0] if single else vectors
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_nlp_pool():
+    """Return the process-wide worker pool, starting it on first use, or None when NLP_WORKERS is 0."""
+    global _pool
+    if NLP_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = NLPWorkerPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def get_embedder(embedding_model=model_registry.DEFAULT_EMBEDDING_MODEL):
+    """Return an embedder for a model: pooled when workers are configured, else the shared in-process model."""
+    pool = get_nlp_pool()
+    if pool is not None:
+        return PooledEmbedder(pool, embedding_model)
+    return model_registry.get_sentence_transformer(embedding_model)
+
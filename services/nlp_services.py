@@ -1,21 +1,101 @@
-import spacy
-from textblob import TextBlob
+import hashlib
+import os
+import re
 from collections import Counter
+from itertools import islice
+import time
 import uuid
-import chromadb
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from typing import List, Dict, Optional
+from services import model_registry, telemetry
+from services.intent_matcher import IntentMatcher, DEFAULT_VOCABULARY
+from services.langid import load_language_identifier
+from services.memory_writer import get_memory_writer
+from services.embedding_cache import CachedEmbedder, get_embedding_cache
+from services.nlp_pool import get_embedder
+from services.vector_index import VectorIndex
+
+# JSON file of {intent: {keyword: weight}}; the built-in vocabulary is used if it is missing
+INTENT_VOCABULARY_PATH = os.getenv("INTENT_VOCABULARY_PATH", "data/intents.json")
+# Directory of the on-disk Chroma store; conversation memory is in-process only when unset
+CONVERSATION_MEMORY_DIR = os.getenv("CONVERSATION_MEMORY_DIR")
+# Index new exchanges on a background thread instead of the request thread
+CONVERSATION_MEMORY_WRITE_BEHIND = os.getenv("CONVERSATION_MEMORY_WRITE_BEHIND", "1") != "0"
+# "local" answers memory queries from an in-process per-session index and uses Chroma
+# only as the long-term store; "chroma" sends every query to Chroma
+CONVERSATION_MEMORY_INDEX = os.getenv("CONVERSATION_MEMORY_INDEX", "local")
+
+
+def load_intent_matcher(path=INTENT_VOCABULARY_PATH):
+    """Return the shared intent matcher compiled from a vocabulary file."""
+    def load():
+        if os.path.exists(path):
+            return IntentMatcher.from_file(path)
+        return IntentMatcher(DEFAULT_VOCABULARY)
+
+    return model_registry.get_model(("intent_matcher", path), load)
+
+
+def _blob(text):
+    # textblob pulls in nltk, so it is imported on first use rather than at startup
+    from textblob import TextBlob
+    return TextBlob(text)
+
+
+def _chunked(iterable, size):
+    """Yield lists of up to size items without materializing the iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class NLPService:
-    def __init__(self):
-        # Load spaCy model for advanced NLP tasks
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("Downloading spaCy model... Please wait.")
-            spacy.cli.download("en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
+    DEFAULT_THRESHOLDS = {
+        "very_positive": 0.5,
+        "positive": 0,
+        "negative": -0.5,
+    }
+
+    def __init__(self, spacy_model=model_registry.DEFAULT_SPACY_MODEL, intent_vocabulary=INTENT_VOCABULARY_PATH):
+        # spaCy pipeline is shared across sessions through the model registry.
+        # Only NER is used, so the parser and lemmatizer are disabled.
+        self.nlp = model_registry.get_spacy_model(spacy_model, disable=model_registry.NER_ONLY_DISABLE)
+        # Intent matcher is compiled once per vocabulary file and shared too
+        self.intent_matcher = load_intent_matcher(intent_vocabulary)
+
+    @telemetry.instrument("nlp.analyze")
+    def analyze(self, text, thresholds=None):
+        """
+        Run sentiment, intent and entity analysis in a single pass.
+
+        The text is parsed once by TextBlob and once by spaCy, and the
+        lowercased text is shared by the intent matcher.
+
+        Args:
+            text (str): Input text to analyze.
+            thresholds (dict): Custom thresholds for sentiment categories.
+
+        Returns:
+            dict: Contains sentiment, detected_intents and entities.
+        """
+        if not text.strip():
+            return {"error": "Input text is empty or invalid."}
+
+        with telemetry.span("nlp.sentiment"):
+            sentiment = self._sentiment_from_blob(_blob(text), thresholds)
+        with telemetry.span("nlp.intents"):
+            detected_intents = self._match_intents(text.lower())
+        with telemetry.span("nlp.spacy"):
+            doc = self.nlp(text)
+        return {
+            "sentiment": sentiment,
+            "detected_intents": detected_intents,
+            "entities": self._entities_from_doc(doc)
+        }
 
+    @telemetry.instrument("nlp.sentiment")
     def analyze_sentiment(self, text, thresholds=None):
         """
         Analyze sentiment of the text using TextBlob and provide detailed insights.
@@ -30,19 +110,17 @@ class NLPService:
         if not text.strip():
             return {"error": "Input text is empty or invalid."}
 
+        return self._sentiment_from_blob(_blob(text), thresholds)
+
+    def _sentiment_from_blob(self, blob, thresholds=None):
         # Set default thresholds
         if thresholds is None:
-            thresholds = {
-                "very_positive": 0.5,
-                "positive": 0,
-                "negative": -0.5,
-            }
+            thresholds = self.DEFAULT_THRESHOLDS
 
-        blob = TextBlob(text)
-        
         # Sentiment polarity and subjectivity
-        polarity = blob.sentiment.polarity
-        subjectivity = blob.sentiment.subjectivity
+        sentiment = blob.sentiment
+        polarity = sentiment.polarity
+        subjectivity = sentiment.subjectivity
         
         # Categorize sentiment
         if polarity > thresholds["very_positive"]:
@@ -62,6 +140,7 @@ class NLPService:
             "sentiment_category": sentiment_category
         }
 
+    @telemetry.instrument("nlp.entities")
     def extract_key_entities(self, text):
         """
         Extract key named entities and their frequency from the text.
@@ -75,7 +154,9 @@ class NLPService:
         if not text.strip():
             return {"error": "Input text is empty or invalid."}
 
-        doc = self.nlp(text)
+        return self._entities_from_doc(self.nlp(text))
+
+    def _entities_from_doc(self, doc):
         entities = Counter()
 
         for ent in doc.ents:
@@ -90,9 +171,10 @@ class NLPService:
         
         return entity_summary
 
+    @telemetry.instrument("nlp.intent")
     def analyze_conversation_intent(self, text, use_keywords=True):
         """
-        Analyze the intent of the conversation using keyword matching.
+        Analyze the intent of the conversation using whole-word keyword matching.
         
         Args:
             text (str): Input text to analyze.
@@ -104,90 +186,434 @@ class NLPService:
         if not text.strip():
             return {"error": "Input text is empty or invalid."}
 
-        intent_keywords = {
-            "travel_planning": ["trip", "vacation", "travel", "destination", "plan"],
-            "budget_inquiry": ["cost", "price", "budget", "expense", "money"],
-            "recommendation": ["suggest", "recommend", "advice", "help"],
-            "complaint": ["problem", "issue", "bad", "terrible", "wrong"],
-            "praise": ["great", "awesome", "amazing", "wonderful", "excellent"]
-        }
-
-        detected_intents = []
-
         # Keyword-based intent detection
-        if use_keywords:
-            text_lower = text.lower()
-            for intent, keywords in intent_keywords.items():
-                matched_keywords = [kw for kw in keywords if kw in text_lower]
-                if matched_keywords:
-                    detected_intents.append({"intent": intent, "keywords_matched": matched_keywords})
-
-        # Sentiment analysis
-        sentiment = self.analyze_sentiment(text)
+        detected_intents = self._match_intents(text.lower()) if use_keywords else []
 
         return {
             "detected_intents": detected_intents,
-            "sentiment": sentiment
+            "sentiment": self._sentiment_from_blob(_blob(text))
         }
 
+    def _match_intents(self, text_lower):
+        return self.intent_matcher.match(text_lower)
+
+    @telemetry.instrument("nlp.analyze_batch")
+    def analyze_batch(self, texts, thresholds=None, batch_size=256, n_process=1):
+        """
+        Stream sentiment, intent and entity analysis over many texts.
+
+        Texts are consumed lazily and fed to spaCy with nlp.pipe, so memory
+        stays bounded however long the input is.
+
+        Args:
+            texts (Iterable[str]): Input texts, e.g. lines of an exported chat log.
+            thresholds (dict): Custom thresholds for sentiment categories.
+            batch_size (int): Number of texts spaCy processes per batch.
+            n_process (int): Number of spaCy worker processes.
+
+        Yields:
+            dict: Same shape as analyze(), in input order.
+        """
+        for doc, text in self.nlp.pipe(((text, text) for text in texts), as_tuples=True,
+                                       batch_size=batch_size, n_process=n_process):
+            if not text.strip():
+                yield {"error": "Input text is empty or invalid."}
+                continue
+            yield {
+                "sentiment": self._sentiment_from_blob(_blob(text), thresholds),
+                "detected_intents": self._match_intents(text.lower()),
+                "entities": self._entities_from_doc(doc)
+            }
+
+    def extract_entities_batch(self, texts, batch_size=256, n_process=1):
+        """
+        Stream named entity extraction over many texts.
+
+        Args:
+            texts (Iterable[str]): Input texts.
+            batch_size (int): Number of texts spaCy processes per batch.
+            n_process (int): Number of spaCy worker processes.
+
+        Yields:
+            dict: Named entities grouped by type with frequencies, in input order.
+        """
+        for doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+            yield self._entities_from_doc(doc)
+
+    def analyze_sentiment_batch(self, texts, thresholds=None):
+        """
+        Stream sentiment analysis over many texts.
+
+        Args:
+            texts (Iterable[str]): Input texts.
+            thresholds (dict): Custom thresholds for sentiment categories.
+
+        Yields:
+            dict: Same shape as analyze_sentiment(), in input order.
+        """
+        for text in texts:
+            yield self.analyze_sentiment(text, thresholds)
+
+    @telemetry.instrument("nlp.embed_batch")
+    def embed_batch(self, texts, batch_size=64, chunk_size=4096,
+                    embedding_model=model_registry.DEFAULT_EMBEDDING_MODEL):
+        """
+        Stream sentence embeddings over many texts.
+
+        Args:
+            texts (Iterable[str]): Input texts.
+            batch_size (int): Texts per SentenceTransformer forward pass.
+            chunk_size (int): Texts read from the input and encoded per yield.
+            embedding_model (str): SentenceTransformer model name.
+
+        Yields:
+            numpy.ndarray: float32 array of shape (len(chunk), dim) per chunk.
+        """
+        embedder = model_registry.get_sentence_transformer(embedding_model)
+        for chunk in _chunked(texts, chunk_size):
+            yield embedder.encode(chunk, batch_size=batch_size, convert_to_numpy=True)
+
+    @telemetry.instrument("nlp.language")
     def detect_language(self, text):
         """
         Detect the language of the input text.
 
+        Uses the bundled character n-gram model, so no network call is made.
+
         Args:
             text (str): Input text to analyze.
 
         Returns:
-            str: Detected language code (e.g., 'en' for English).
+            str: Detected language code (e.g., 'en' for English), or None if
+                the text has no letters.
         """
         if not text.strip():
             return {"error": "Input text is empty or invalid."}
-        
-        blob = TextBlob(text)
-        return blob.detect_language()
+
+        language, _ = load_language_identifier().detect(text)
+        return language
+
+    def identify_language(self, text):
+        """
+        Detect the language of the input text with a confidence score.
+
+        Args:
+            text (str): Input text to analyze.
+
+        Returns:
+            dict: Contains language and confidence (0-1).
+        """
+        if not text.strip():
+            return {"error": "Input text is empty or invalid."}
+
+        language, confidence = load_language_identifier().detect(text)
+        return {"language": language, "confidence": confidence}
+
+    def identify_language_batch(self, texts, chunk_size=4096):
+        """
+        Stream language detection results over many texts.
+
+        Args:
+            texts (Iterable[str]): Input texts.
+            chunk_size (int): Texts read from the input and scored together.
+
+        Yields:
+            dict: Same shape as identify_language, one per input text.
+        """
+        identifier = load_language_identifier()
+        for chunk in _chunked(texts, chunk_size):
+            for text, (language, confidence) in zip(chunk, identifier.detect_batch(chunk)):
+                if not text.strip():
+                    yield {"error": "Input text is empty or invalid."}
+                else:
+                    yield {"language": language, "confidence": confidence}
 
 
 class ConversationMemory:
-    def __init__(self, max_history=50, embedding_model='all-MiniLM-L6-v2'):
-        self.client = chromadb.Client()
-        self.collection = self.client.get_or_create_collection(name="conversation_memory")
-        self.embedder = SentenceTransformer(embedding_model)
+    """
+    Per-session conversation history backed by a Chroma vector store.
+
+    Every embedding model has its own collection, shared by all sessions
+    using that model and kept apart by a session_id metadata filter, so
+    vectors of different models are never compared. With a persist_directory the store survives restarts
+    and the history is reloaded lazily from it on first access. With
+    write_behind, embedding and Chroma writes are batched on a background
+    thread and the in-memory history is updated immediately. With the
+    "local" index, queries are answered from a VectorIndex of this session's
+    exchanges; new exchanges are embedded into it on the next query.
+    """
+
+    COLLECTION_NAME = "conversation_memory"
+
+    def __init__(self, max_history=50, embedding_model=model_registry.DEFAULT_EMBEDDING_MODEL,
+                 session_id: Optional[str] = None, persist_directory: Optional[str] = CONVERSATION_MEMORY_DIR,
+                 write_behind: bool = CONVERSATION_MEMORY_WRITE_BEHIND, index: str = CONVERSATION_MEMORY_INDEX):
+        if index not in ("local", "chroma"):
+            raise ValueError(f"Unknown conversation memory index {index!r}, expected 'local' or 'chroma'")
+        self.session_id = session_id or str(uuid.uuid4())
+        self.client = model_registry.get_chroma_client(persist_directory)
+        self.collection = self.client.get_or_create_collection(name=self.collection_name(embedding_model))
+        self.embedding_model = embedding_model
+        # Repeated queries and re-indexed texts are served from the shared embedding cache
+        self.embedder = CachedEmbedder(
+            get_embedder(embedding_model),
+            model_registry.embedding_model_id(embedding_model),
+            get_embedding_cache()
+        )
         self.max_history = max_history
-        self.history: List[Dict] = []
+        self.writer = get_memory_writer() if write_behind else None
+        self._pending_writes = False
+        self._history: Optional[List[Dict]] = None
+        self.index = VectorIndex(max_history) if index == "local" and max_history > 0 else None
+        # Exchanges added since the last query, by id, waiting to be embedded into the index
+        self._unindexed: Dict[str, str] = {}
 
-    def add_conversation(self, user_message: str, ai_response: str):
-        conv_id = str(uuid.uuid4())
-        full_text = f"User: {user_message}\nAI: {ai_response}"
-        embedding = self.embedder.encode(full_text).tolist()
+    @classmethod
+    def collection_name(cls, embedding_model: str) -> str:
+        """Return the Chroma collection holding exchanges embedded by a model."""
+        model_id = model_registry.embedding_model_id(embedding_model)
+        if model_id == model_registry.embedding_model_id():
+            return cls.COLLECTION_NAME
+        # Chroma names are 3-63 characters of [A-Za-z0-9._-]; the digest keeps them unique
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "-", model_id).strip("._-")[:40]
+        digest = hashlib.blake2b(model_id.encode(), digest_size=4).hexdigest()
+        return f"{cls.COLLECTION_NAME}_{slug}_{digest}"
 
-        # Add to vector database
-        self.collection.add(
-            ids=[conv_id],
-            embeddings=[embedding],
-            documents=[full_text]
+    @property
+    def history(self) -> List[Dict]:
+        if self._history is None:
+            self._history = self._load_history()
+        return self._history
+
+    @telemetry.instrument("memory.load_history")
+    def _load_history(self) -> List[Dict]:
+        # Another memory for this session may still have writes queued
+        if self.writer is not None:
+            self.writer.flush()
+        include = ["metadatas", "embeddings"] if self.index is not None else ["metadatas"]
+        stored = self.collection.get(where={"session_id": self.session_id}, include=include)
+        history = [
+            {
+                "id": conv_id,
+                "user_message": metadata["user_message"],
+                "ai_response": metadata["ai_response"],
+                "timestamp": metadata["timestamp"]
+            }
+            for conv_id, metadata in zip(stored["ids"], stored["metadatas"])
+        ]
+        history.sort(key=lambda entry: entry["timestamp"])
+
+        # The bound may have been lowered since these were stored
+        self._evict(history)
+
+        if self.index is not None and history:
+            model_id = model_registry.embedding_model_id(self.embedding_model)
+            embeddings = dict(zip(stored["ids"], stored["embeddings"]))
+            models = {conv_id: metadata.get("embedding_model") for conv_id, metadata in zip(stored["ids"], stored["metadatas"])}
+            for entry in history:
+                embedding = embeddings[entry["id"]]
+                if models[entry["id"]] == model_id and self.index.dim in (None, len(embedding)):
+                    self.index.add(entry["id"], embedding)
+                else:
+                    # Stored by another embedding model (or before the model was recorded):
+                    # not comparable with this model's queries, so embed it again on the next query
+                    self._unindexed[entry["id"]] = self._document(entry["user_message"], entry["ai_response"])
+        return history
+
+    def _evict(self, history: List[Dict]):
+        overflow = len(history) - self.max_history
+        if overflow > 0:
+            evicted = [entry["id"] for entry in history[:overflow]]
+            del history[:overflow]
+            if self.index is not None:
+                self.index.delete(evicted)
+                for conv_id in evicted:
+                    self._unindexed.pop(conv_id, None)
+            if self.writer is not None:
+                self.writer.submit_delete(self.collection, evicted)
+                self._pending_writes = True
+            else:
+                self.collection.delete(ids=evicted)
+
+    @telemetry.instrument("memory.set_embedding_model")
+    def set_embedding_model(self, embedding_model: str):
+        """
+        Switch this session to another embedding model.
+
+        Only this session changes: other sessions keep their model, which stays
+        in the model registry. The session's history is re-embedded with the new
+        model and moved to that model's collection.
+        """
+        if embedding_model == self.embedding_model:
+            return
+        history = self.history
+        # Queued writes target the old collection and must land before it is read
+        self.flush()
+        embedder = CachedEmbedder(
+            get_embedder(embedding_model),
+            model_registry.embedding_model_id(embedding_model),
+            get_embedding_cache()
         )
+        collection = self.client.get_or_create_collection(name=self.collection_name(embedding_model))
+        old_collection = self.collection
+        self.collection, self.embedder, self.embedding_model = collection, embedder, embedding_model
+
+        # Vectors of the old model are not comparable with the new one's
+        if self.index is not None:
+            self.index.clear()
+            self._unindexed.clear()
+        if not history:
+            return
+        ids = [entry["id"] for entry in history]
+        documents = [self._document(entry["user_message"], entry["ai_response"]) for entry in history]
+        embeddings = embedder.encode(documents, batch_size=len(documents))
+        collection.upsert(
+            ids=ids,
+            embeddings=[embedding.tolist() for embedding in embeddings],
+            documents=documents,
+            metadatas=[self._metadata(entry) for entry in history]
+        )
+        old_collection.delete(ids=ids)
+        if self.index is not None:
+            for conv_id, embedding in zip(ids, embeddings):
+                self.index.add(conv_id, embedding)
+
+    def _metadata(self, entry: Dict) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "user_message": entry["user_message"],
+            "ai_response": entry["ai_response"],
+            "timestamp": entry["timestamp"],
+            "embedding_model": model_registry.embedding_model_id(self.embedding_model)
+        }
+
+    @staticmethod
+    def _document(user_message: str, ai_response: str) -> str:
+        return f"User: {user_message}\nAI: {ai_response}"
+
+    @telemetry.instrument("memory.add")
+    def add_conversation(self, user_message: str, ai_response: str):
+        # Load stored history first, or the reload would flush and include this entry too
+        history = self.history
+        conv_id = str(uuid.uuid4())
+        full_text = self._document(user_message, ai_response)
 
-        # Store in memory
         conversation_entry = {
             "id": conv_id,
             "user_message": user_message,
             "ai_response": ai_response,
-            "timestamp": uuid.uuid1().time
+            "timestamp": time.time()
         }
+        metadata = self._metadata(conversation_entry)
 
-        self.history.append(conversation_entry)
+        # Add to vector database
+        if self.writer is not None:
+            self.writer.submit_add(self.collection, self.embedder, conv_id, full_text, metadata)
+            self._pending_writes = True
+        else:
+            embedding = self.embedder.encode(full_text).tolist()
+            self.collection.add(
+                ids=[conv_id],
+                embeddings=[embedding],
+                documents=[full_text],
+                metadatas=[metadata]
+            )
 
-        if len(self.history) > self.max_history:
-            old_entry = self.history.pop(0)
-            self.collection.delete(ids=[old_entry["id"]])
+        # Store in memory
+        history.append(conversation_entry)
+        if self.index is not None:
+            self._unindexed[conv_id] = full_text
+        self._evict(history)
+
+    @telemetry.instrument("memory.flush")
+    def flush(self):
+        """Wait until this memory's queued background writes have reached the store."""
+        if self.writer is not None and self._pending_writes:
+            self.writer.flush()
+            self._pending_writes = False
+
+    def _sync_index(self):
+        if not self._unindexed:
+            return
+        ids, texts = list(self._unindexed), list(self._unindexed.values())
+        for conv_id, vector in zip(ids, self.embedder.encode(texts, batch_size=len(texts))):
+            self.index.add(conv_id, vector)
+        self._unindexed.clear()
+
+    def _query_index(self, query: str, top_k: int):
+        """Return (history entry, cosine similarity) pairs from the local index, closest first."""
+        with telemetry.span("memory.index_sync"):
+            self._sync_index()
+        with telemetry.span("memory.embed_query"):
+            query_embedding = self.embedder.encode(query)
+        with telemetry.span("memory.index_query"):
+            matches = self.index.search(query_embedding, top_k)
+        entries = {entry["id"]: entry for entry in self.history}
+        return [(entries[conv_id], similarity) for conv_id, similarity in matches if conv_id in entries]
 
+    @telemetry.instrument("memory.retrieve")
     def retrieve_relevant_context(self, query: str, top_k: int = 3):
-        query_embedding = self.embedder.encode(query).tolist()
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k
-        )
+        stored = len(self.history)
+        if not stored:
+            return []
+        if self.index is not None:
+            # Same shape as a Chroma query: one list of documents per query
+            return [[self._document(entry["user_message"], entry["ai_response"])
+                     for entry, _ in self._query_index(query, top_k)]]
+        # Read our own writes: the last exchange is usually the most relevant context
+        self.flush()
+
+        with telemetry.span("memory.embed_query"):
+            query_embedding = self.embedder.encode(query).tolist()
+        with telemetry.span("memory.chroma_query"):
+            results = self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=min(top_k, stored),
+                where={"session_id": self.session_id}
+            )
         return results.get('documents', [])
 
+    @telemetry.instrument("memory.retrieve")
+    def retrieve_relevant_memories(self, query: str, top_k: int = 3) -> List[Dict]:
+        """
+        Retrieve the stored exchanges closest to a query, with their distances.
+
+        Args:
+            query (str): Text to search for.
+            top_k (int): Maximum number of exchanges to return.
+
+        Returns:
+            list: History-style entries with an added "distance", closest first.
+        """
+        stored = len(self.history)
+        if not stored:
+            return []
+        if self.index is not None:
+            # Unit vectors: squared L2 distance, as Chroma reports it, is 2 - 2 * cosine similarity
+            return [{**entry, "distance": 2 - 2 * similarity} for entry, similarity in self._query_index(query, top_k)]
+        self.flush()
+
+        with telemetry.span("memory.embed_query"):
+            query_embedding = self.embedder.encode(query).tolist()
+        with telemetry.span("memory.chroma_query"):
+            results = self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=min(top_k, stored),
+                where={"session_id": self.session_id},
+                include=["metadatas", "distances"]
+            )
+        return [
+            {
+                "id": conv_id,
+                "user_message": metadata["user_message"],
+                "ai_response": metadata["ai_response"],
+                "timestamp": metadata["timestamp"],
+                "distance": distance
+            }
+            for conv_id, metadata, distance in zip(
+                results["ids"][0], results["metadatas"][0], results["distances"][0]
+            )
+        ]
+
     def get_recent_history(self, num_messages: int = 5):
-        return self.history[-num_messages:]
\ No newline at end of file
+        return self.history[-num_messages:]
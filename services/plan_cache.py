@@ -0,0 +1,167 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from services import model_registry, telemetry
+from services.api_services import normalize_destination
+from services.cache import TTLCache
+from services.nlp_pool import get_embedder
+
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "256"))
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", str(6 * 60 * 60)))
+PLAN_CACHE_SEMANTIC = os.getenv("PLAN_CACHE_SEMANTIC", "0") == "1"
+PLAN_CACHE_SIMILARITY = float(os.getenv("PLAN_CACHE_SIMILARITY", "0.92"))
+
+# Budget band upper bounds in USD; plans within a band are interchangeable
+BUDGET_BANDS = (500, 1000, 2000, 3500, 5000, 8000, 12000)
+# Temperature band upper bounds in °C
+TEMPERATURE_BANDS = ((5, "cold"), (15, "cool"), (25, "mild"))
+
+
+def budget_bucket(budget):
+    for upper in BUDGET_BANDS:
+        if budget < upper:
+            return f"<{upper}"
+    return f">={BUDGET_BANDS[-1]}"
+
+
+def weather_bucket(weather_data):
+    """Reduce an OpenWeatherMap payload to a coarse "condition/temperature band" label."""
+    condition = weather_data['weather'][0].get('main', 'unknown').lower()
+    temperature = weather_data['main']['temp']
+    for upper, label in TEMPERATURE_BANDS:
+        if temperature < upper:
+            return f"{condition}/{label}"
+    return f"{condition}/hot"
+
+
+class PlanCache:
+    """
+    Cache of generated travel plans keyed on the parts of a request that shape the plan
+
+    Requests match exactly on (destination, budget band, sorted interests,
+    weather bucket). With semantic matching enabled, an exact miss falls back
+    to the most similar cached request for the same destination, budget band
+    and weather bucket, compared by SentenceTransformer embeddings of
+    destination and interests. The fallback only bridges differently worded
+    interests; it never serves one city's plan for another.
+
+    Args:
+        max_size (int): Maximum number of cached plans
+        ttl (float): Plan lifetime in seconds
+        semantic (bool): Enable the embedding-similarity fallback
+        similarity_threshold (float): Minimum cosine similarity for a semantic hit
+        embedding_model (str): SentenceTransformer used for semantic matching
+    """
+
+    def __init__(self, max_size=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL, semantic=PLAN_CACHE_SEMANTIC,
+                 similarity_threshold=PLAN_CACHE_SIMILARITY,
+                 embedding_model=model_registry.DEFAULT_EMBEDDING_MODEL):
+        self.ttl = ttl
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.embedding_model = embedding_model
+        self._plans = TTLCache(max_size=max_size)
+        # Semantic index: cache key -> (group, unit embedding), bounded like the plan cache
+        self._vectors = OrderedDict()
+        self._max_vectors = max_size
+        self._lock = threading.Lock()
+        self._counts = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    @staticmethod
+    def describe(destination, budget, interests, weather_data):
+        """
+        Normalize a plan request
+
+        Returns:
+            tuple: (exact cache key, semantic group, text to embed)
+        """
+        destination = normalize_destination(destination)
+        interests = sorted(interest.casefold() for interest in interests)
+        group = f"{destination}|{budget_bucket(budget)}|{weather_bucket(weather_data)}"
+        key = f"{group}|{','.join(interests)}"
+        text = f"Trip to {destination} for {', '.join(interests)}"
+        return key, group, text
+
+    def _embed(self, text):
+        embedder = get_embedder(self.embedding_model)
+        return np.asarray(embedder.encode(text, normalize_embeddings=True), dtype=np.float32)
+
+    def get(self, destination, budget, interests, weather_data):
+        """
+        Look up a cached plan
+
+        Returns:
+            str: Cached plan, or None on a miss
+        """
+        key, group, text = self.describe(destination, budget, interests, weather_data)
+        hit, plan = self._plans.get(key)
+        if hit:
+            self._count("exact_hits")
+            return plan
+
+        plan = self._semantic_get(group, text) if self.semantic else None
+        self._count("semantic_hits" if plan is not None else "misses")
+        return plan
+
+    def _semantic_get(self, group, text):
+        with self._lock:
+            candidates = [(k, v) for k, (g, v) in self._vectors.items() if g == group]
+        if not candidates:
+            return None
+
+        keys, vectors = zip(*candidates)
+        scores = np.stack(vectors) @ self._embed(text)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+
+        hit, plan = self._plans.get(keys[best])
+        if not hit:
+            # The plan expired or was evicted; drop its vector too
+            with self._lock:
+                self._vectors.pop(keys[best], None)
+        return plan
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def put(self, destination, budget, interests, weather_data, plan):
+        key, group, text = self.describe(destination, budget, interests, weather_data)
+        self._plans.set(key, plan, self.ttl)
+        if not self.semantic:
+            return
+
+        vector = self._embed(text)
+        with self._lock:
+            self._vectors[key] = (group, vector)
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self._max_vectors:
+                self._vectors.popitem(last=False)
+
+    def stats(self):
+        """Return exact and semantic hit counts, misses, evictions and the overall hit rate."""
+        plan_stats = self._plans.stats()
+        with self._lock:
+            stats = dict(self._counts)
+        lookups = sum(stats.values())
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        stats["evictions"] = plan_stats["evictions"]
+        stats["expirations"] = plan_stats["expirations"]
+        stats["size"] = plan_stats["size"]
+        return stats
+
+
+plan_cache = PlanCache()
+
+
+def _collect_metrics():
+    for name, value in plan_cache.stats().items():
+        yield f"plan_cache_{name}", {}, value
+
+
+telemetry.register_collector(_collect_metrics)
@@ -0,0 +1,165 @@
+import hashlib
+
+from services import telemetry
+from services.api_services import fetch_destination_data
+from services.llm_services import complete, stream_complete
+from services.plan_cache import plan_cache
+from services.single_flight import SingleFlight
+
+# Length of the generated itinerary, also used for the budget estimate
+PLAN_DAYS = 5
+
+# Sampling parameters shared by the blocking and streaming plan generators
+PLAN_COMPLETION_PARAMS = {
+    "temperature": 0.9,  # Adjust creativity level (0.0 - 1.0)
+    "max_tokens": 3500,  # Control the length of the response
+    "top_p": 0.7,  # Nucleus sampling (0.0 - 1.0)
+    "frequency_penalty": 0.5,  # Avoid repetition of words
+    "presence_penalty": 0.3  # Reduce repetition of topics
+}
+
+PLAN_ERROR_MESSAGE = "Sorry, there was an error generating your travel plan."
+MISSING_DATA_MESSAGE = "Could not fetch weather or attractions. Please try again."
+
+# Concurrent requests with the same prompt share one blocking completion, or one streamed completion
+_plan_flight = SingleFlight("planner.generate_plan")
+_plan_stream_flight = SingleFlight("planner.stream_plan")
+
+
+def build_travel_plan_prompt(destination, budget, interests, weather_data, attractions):
+    return f"""
+    You are a friendly and knowledgeable travel guide. Based on the following:
+    Destination: {destination}
+    Budget: {budget}
+    Interests: {interests}
+    Weather: {weather_data['weather'][0]['description']} with a temperature of {weather_data['main']['temp']}°C
+    Attractions: {', '.join([attraction['name'] for attraction in attractions])}
+
+    Please create a personalized, friendly, and engaging {PLAN_DAYS} day travel plan. Make sure to:
+    1. Provide a day-by-day itinerary with fun activities, places to visit, and food recommendations.
+    2. Suggest budget-friendly options while considering the user's interests and preferences.
+    3. Include helpful travel tips, such as what to pack or how to get around.
+    4. Keep the tone conversational and warm, like a local guide sharing their favorite spots.
+    """
+
+
+def can_plan(weather_data, attractions):
+    """Return True if there is enough destination data to write a plan."""
+    return bool(weather_data) and len(attractions or []) > 0
+
+
+def _complete_plan(user_query):
+    response = complete(
+        messages=[{"role": "user", "content": user_query}],
+        **PLAN_COMPLETION_PARAMS
+    )
+    return response['choices'][0]['message']['content']
+
+
+def _stream_plan(user_query):
+    return stream_complete(
+        messages=[{"role": "user", "content": user_query}],
+        **PLAN_COMPLETION_PARAMS
+    )
+
+
+def coalescing_stats():
+    """Return how many plan completions ran and how many identical requests were collapsed into them."""
+    return {"generate": _plan_flight.stats(), "stream": _plan_stream_flight.stats()}
+
+
+@telemetry.instrument("planner.generate_plan")
+def generate_travel_plan(destination, budget, interests, weather_data, attractions):
+    """
+    Generate a travel plan in one blocking completion
+
+    Concurrent calls with the same prompt wait for a single completion and
+    all receive its plan, or its error.
+
+    Returns:
+        dict: plan (the text, or PLAN_ERROR_MESSAGE on failure), cached (served
+            from the plan cache) and error (message, or None on success)
+    """
+    # Near-identical requests reuse a recent plan instead of a new 3500-token call
+    cached_plan = plan_cache.get(destination, budget, interests, weather_data)
+    if cached_plan is not None:
+        return {"plan": cached_plan, "cached": True, "error": None}
+
+    user_query = build_travel_plan_prompt(destination, budget, interests, weather_data, attractions)
+    key = hashlib.sha256(user_query.encode("utf-8")).hexdigest()
+
+    try:
+        travel_plan = _plan_flight.do(key, _complete_plan, (user_query,))
+    except Exception as e:
+        return {"plan": PLAN_ERROR_MESSAGE, "cached": False, "error": f"Error generating travel plan: {e}"}
+
+    plan_cache.put(destination, budget, interests, weather_data, travel_plan)
+    return {"plan": travel_plan, "cached": False, "error": None}
+
+
+@telemetry.instrument("planner.stream_plan")
+def stream_travel_plan(destination, budget, interests, weather_data, attractions, status=None):
+    """
+    Stream the travel plan token by token
+
+    Concurrent calls with the same prompt follow a single streamed
+    completion: each receives every chunk, or its error.
+
+    Args:
+        status (dict): Optional dict filled with "cached" and "error" (message,
+            or None on success) once the stream ends
+
+    Yields:
+        str: Plan text chunks, or PLAN_ERROR_MESSAGE if generation fails
+    """
+    status = {} if status is None else status
+    status.update(cached=False, error=None)
+
+    cached_plan = plan_cache.get(destination, budget, interests, weather_data)
+    if cached_plan is not None:
+        status["cached"] = True
+        yield cached_plan
+        return
+
+    user_query = build_travel_plan_prompt(destination, budget, interests, weather_data, attractions)
+    key = hashlib.sha256(user_query.encode("utf-8")).hexdigest()
+
+    chunks = []
+    try:
+        for chunk in _plan_stream_flight.stream(key, _stream_plan, (user_query,)):
+            chunks.append(chunk)
+            yield chunk
+    except Exception as e:
+        status["error"] = f"Error generating travel plan: {e}"
+        yield PLAN_ERROR_MESSAGE
+        return
+
+    plan_cache.put(destination, budget, interests, weather_data, "".join(chunks))
+
+
+@telemetry.instrument("planner.plan_trip")
+def plan_trip(destination, budget, interests, memory=None):
+    """
+    Run the whole planner pipeline: destination lookups, then plan generation
+
+    Args:
+        destination (str): Travel destination
+        budget (float): Budget in USD
+        interests (list): Traveller interests
+        memory (ConversationMemory): Optional session memory the plan is saved to
+
+    Returns:
+        dict: weather, attractions and recommendations, provider errors by
+            name, plan, cached, and error (None when a plan was generated)
+    """
+    results, errors = fetch_destination_data(destination)
+    trip = {"destination": destination, **results, "errors": errors, "plan": None, "cached": False}
+
+    if not can_plan(results["weather"], results["attractions"]):
+        trip["error"] = MISSING_DATA_MESSAGE
+        return trip
+
+    trip.update(generate_travel_plan(destination, budget, interests, results["weather"], results["attractions"]))
+    if memory is not None and trip["error"] is None:
+        memory.add_conversation(f"Travel Plan for {destination}", trip["plan"])
+    return trip
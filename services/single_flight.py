@@ -0,0 +1,199 @@
+import contextvars
+import threading
+
+from services import telemetry
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "cancelled")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.cancelled = False
+
+
+class _Stream:
+    __slots__ = ("chunks", "done", "error", "condition")
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.condition = threading.Condition()
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait and receive its result, or the same exception. Once it
+    finishes the key is released, so later calls run again: results are
+    not cached here.
+
+    If the running caller is cancelled (a BaseException that is not an
+    Exception, such as Streamlit stopping a script run), waiters are not
+    handed the cancellation: one of them runs the function instead.
+
+    stream() does the same for functions that return an iterable of chunks:
+    one run is shared chunk by chunk between every concurrent caller.
+
+    Args:
+        name (str): Label for the exported counters
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self._stats = {"executions": 0, "collapsed": 0, "errors": 0, "cancelled": 0}
+        telemetry.register_collector(self._collect_metrics)
+
+    def do(self, key, fn, args=(), kwargs=None, wait_timeout=None):
+        """
+        Run fn(*args, **kwargs), or wait for the run already in flight for key
+
+        fn's arguments are passed as a tuple and a dict, so keyword arguments
+        such as a request timeout always reach fn and never the wait itself.
+
+        Args:
+            key (hashable): Calls with equal keys are collapsed
+            fn (callable): Function to run
+            args (tuple): Positional arguments for fn
+            kwargs (dict): Keyword arguments for fn
+            wait_timeout (float): Maximum seconds to wait for another caller's run
+
+        Returns:
+            object: The function's result
+
+        Raises:
+            TimeoutError: If the run in flight did not finish within wait_timeout
+            Exception: Whatever the function raised, in every waiting caller
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self._stats["executions"] += 1
+                else:
+                    self._stats["collapsed"] += 1
+
+            if leader:
+                return self._run(key, call, fn, args, kwargs or {})
+
+            if not call.done.wait(wait_timeout):
+                # Only this caller gives up; the run in flight carries on for the others
+                raise TimeoutError(f"{self.name} call for {key!r} did not finish within {wait_timeout}s")
+            if call.cancelled:
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    def _run(self, key, call, fn, args, kwargs):
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        except BaseException:
+            call.cancelled = True
+            with self._lock:
+                self._stats["cancelled"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stream(self, key, fn, args=(), kwargs=None, wait_timeout=None):
+        """
+        Iterate fn(*args, **kwargs), or follow the run already in flight for key
+
+        The first caller starts a background thread that drains the iterable
+        into a shared buffer. Every caller, the first included, replays the
+        buffer from the start and then follows it as chunks arrive, so a
+        caller that stops iterating early (a closed browser tab) does not cut
+        the stream short for the others.
+
+        Args:
+            key (hashable): Calls with equal keys are collapsed
+            fn (callable): Function returning an iterable of chunks
+            args (tuple): Positional arguments for fn
+            kwargs (dict): Keyword arguments for fn
+            wait_timeout (float): Maximum seconds to wait for the next chunk
+
+        Yields:
+            object: The chunks of the shared run, in order
+
+        Raises:
+            TimeoutError: If no chunk arrived within wait_timeout
+            Exception: Whatever the iterable raised, in every caller, after
+                the chunks produced before the error
+        """
+        with self._lock:
+            stream = self._streams.get(key)
+            leader = stream is None
+            if leader:
+                stream = self._streams[key] = _Stream()
+                self._stats["executions"] += 1
+            else:
+                self._stats["collapsed"] += 1
+
+        if leader:
+            # The producer runs in a copy of the caller's context, so its spans nest under the caller's
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._drain, key, stream, fn, args, kwargs or {}),
+                name=f"{self.name}-stream",
+                daemon=True,
+            ).start()
+
+        index = 0
+        while True:
+            with stream.condition:
+                while index == len(stream.chunks) and not stream.done:
+                    if not stream.condition.wait(wait_timeout):
+                        raise TimeoutError(f"{self.name} stream for {key!r} sent nothing for {wait_timeout}s")
+                chunks = stream.chunks[index:]
+                finished = stream.done
+            index += len(chunks)
+            yield from chunks
+            if finished:
+                break
+        if stream.error is not None:
+            raise stream.error
+
+    def _drain(self, key, stream, fn, args, kwargs):
+        try:
+            for chunk in fn(*args, **kwargs):
+                with stream.condition:
+                    stream.chunks.append(chunk)
+                    stream.condition.notify_all()
+        except Exception as e:
+            stream.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+        finally:
+            with self._lock:
+                del self._streams[key]
+            with stream.condition:
+                stream.done = True
+                stream.condition.notify_all()
+
+    def stats(self):
+        """Return execution, collapsed-call, error and cancellation counts and the calls in flight."""
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls) + len(self._streams)}
+
+    def _collect_metrics(self):
+        for name, value in self.stats().items():
+            yield f"single_flight_{name}", {"flight": self.name}, value
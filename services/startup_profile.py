@@ -0,0 +1,139 @@
+"""
+Cold-start profile of the app, broken down per subsystem
+
+Import time is measured in fresh interpreters with ``-X importtime``, once for
+what ``import main_app`` loads at startup and once for the full stack the
+pages load later. Each module's own import time is charged to the subsystem
+owning its top-level package. Init time is the load time of each model or
+client the background warm-up loads.
+
+Usage:
+    python -m services.startup_profile [--skip-init] [--json startup.json]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import Counter
+
+SUBSYSTEMS = {
+    "ui": ("streamlit", "altair", "pyarrow", "pydeck", "tornado", "watchdog", "toml", "rich"),
+    "llm": ("litellm", "openai", "tiktoken", "httpx", "httpcore", "aiohttp", "jiter", "jsonschema"),
+    "nlp": ("spacy", "thinc", "textblob", "nltk", "blis", "srsly", "cymem", "preshed", "murmurhash",
+            "catalogue", "confection", "wasabi", "weasel", "langcodes", "en_core_web_sm"),
+    "embeddings": ("sentence_transformers", "transformers", "torch", "huggingface_hub", "tokenizers",
+                   "safetensors", "sklearn", "scipy", "sympy", "networkx"),
+    "vector_store": ("chromadb", "onnxruntime", "opentelemetry", "grpc", "posthog", "kubernetes", "pypika"),
+    "data_charts": ("numpy", "pandas", "plotly"),
+    "http": ("requests", "urllib3", "certifi", "charset_normalizer", "idna"),
+    "pdf": ("fpdf",),
+    "app": ("main_app", "pages", "services", "utils"),
+}
+_PACKAGE_SUBSYSTEM = {package: name for name, packages in SUBSYSTEMS.items() for package in packages}
+
+STARTUP_IMPORTS = "import main_app"
+DEFERRED_MODULES = ("pages.chatbot_page", "litellm", "spacy", "textblob", "sentence_transformers",
+                    "chromadb", "pandas", "plotly.graph_objects")
+# Deferred modules that are not installed are skipped rather than failing the profile
+FULL_STACK_IMPORTS = (f"import importlib, main_app\n"
+                      f"for name in {DEFERRED_MODULES!r}:\n"
+                      f"    try:\n"
+                      f"        importlib.import_module(name)\n"
+                      f"    except ImportError:\n"
+                      f"        pass\n")
+
+
+def subsystem_of(module):
+    """Return the subsystem owning a dotted module name ("other" if unknown)."""
+    return _PACKAGE_SUBSYSTEM.get(module.split(".")[0], "other")
+
+
+def import_profile(code):
+    """
+    Run code in a fresh interpreter under -X importtime
+
+    Returns:
+        tuple: (wall seconds, Counter of self import seconds per subsystem,
+            Counter of self import seconds per top-level package)
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+
+    by_subsystem, by_package = Counter(), Counter()
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        module = module.strip()
+        by_subsystem[subsystem_of(module)] += int(self_us) / 1e6
+        by_package[module.split(".")[0]] += int(self_us) / 1e6
+    return wall, by_subsystem, by_package
+
+
+def init_profile():
+    """Load everything the warm-up loads, one at a time, and return seconds per step."""
+    from services import model_registry
+    from services.llm_services import load_litellm
+    from services.nlp_services import CONVERSATION_MEMORY_DIR
+
+    steps = {
+        "vector_store: chroma client": lambda: model_registry.get_chroma_client(CONVERSATION_MEMORY_DIR),
+        "embeddings: sentence transformer": model_registry.get_sentence_transformer,
+        "llm: litellm": load_litellm,
+        "nlp: spacy pipeline": lambda: model_registry.get_spacy_model(disable=model_registry.NER_ONLY_DISABLE),
+    }
+    timings = {}
+    for name, load in steps.items():
+        start = time.perf_counter()
+        try:
+            load()
+            timings[name] = time.perf_counter() - start
+        except Exception as e:
+            timings[name] = None
+            print(f"  {name} failed: {e}", file=sys.stderr)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skip-init", action="store_true", help="only profile imports")
+    parser.add_argument("--top", type=int, default=10, help="top-level packages to list")
+    parser.add_argument("--json", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    startup_wall, startup, startup_packages = import_profile(STARTUP_IMPORTS)
+    full_wall, full, _ = import_profile(FULL_STACK_IMPORTS)
+
+    print(f"{'subsystem':<16} {'startup':>10} {'full stack':>12}")
+    for name in sorted(set(startup) | set(full), key=lambda name: -full[name]):
+        print(f"{name:<16} {startup[name] * 1000:8.0f}ms {full[name] * 1000:10.0f}ms")
+    print(f"{'wall (process)':<16} {startup_wall * 1000:8.0f}ms {full_wall * 1000:10.0f}ms")
+
+    print("\nslowest packages imported at startup")
+    for package, seconds in startup_packages.most_common(args.top):
+        print(f"  {package:<24} {seconds * 1000:8.0f}ms  ({subsystem_of(package)})")
+
+    init = {} if args.skip_init else init_profile()
+    if init:
+        print("\ninit (warm-up loads, including their imports)")
+        for name, seconds in init.items():
+            print(f"  {name:<34} {'failed' if seconds is None else f'{seconds * 1000:8.0f}ms'}")
+
+    if args.json:
+        report = {
+            "startup_wall": startup_wall,
+            "full_stack_wall": full_wall,
+            "import_startup": dict(startup),
+            "import_full_stack": dict(full),
+            "init": init,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+
+from services.metrics import Histogram
+
+# Set TELEMETRY_ENABLED=0 to turn every span and counter into a no-op
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "1") != "0"
+# Set TELEMETRY_PORT to serve /metrics in Prometheus text format from the app process
+TELEMETRY_PORT = os.getenv("TELEMETRY_PORT")
+TRACE_BUFFER_SIZE = int(os.getenv("TELEMETRY_TRACE_BUFFER", "200"))
+METRIC_PREFIX = "voyager"
+
+_enabled = TELEMETRY_ENABLED
+_lock = threading.Lock()
+_span_histograms = {}
+_counters = {}
+_collectors = []
+_traces = deque(maxlen=TRACE_BUFFER_SIZE)
+_current_span = contextvars.ContextVar("telemetry_span", default=None)
+_server = None
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(flag):
+    """Turn instrumentation on or off at runtime."""
+    global _enabled
+    _enabled = bool(flag)
+
+
+class _Span:
+    __slots__ = ("name", "duration", "error", "children")
+
+    def __init__(self, name):
+        self.name = name
+        self.duration = 0.0
+        self.error = None
+        self.children = []
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "duration": self.duration,
+            "error": self.error,
+            "children": [child.as_dict() for child in self.children],
+        }
+
+
+def _record(span, parent):
+    with _lock:
+        histogram = _span_histograms.get(span.name)
+        if histogram is None:
+            histogram = _span_histograms[span.name] = Histogram()
+        if span.error:
+            key = ("span_errors_total", (("span", span.name),))
+            _counters[key] = _counters.get(key, 0) + 1
+        if parent is not None:
+            parent.children.append(span)
+        else:
+            _traces.append(span)
+    histogram.observe(span.duration)
+
+
+class _SpanContext:
+    __slots__ = ("span", "parent", "token", "start")
+
+    def __init__(self, name):
+        self.span = _Span(name)
+
+    def __enter__(self):
+        self.parent = _current_span.get()
+        self.token = _current_span.set(self.span)
+        self.start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.duration = time.perf_counter() - self.start
+        _current_span.reset(self.token)
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        _record(self.span, self.parent)
+        return False
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name):
+    """
+    Time a block as a named span, nested under the enclosing span if any
+
+    Args:
+        name (str): Span name, e.g. "nlp.spacy"
+
+    Returns:
+        context manager: Records duration and errors on exit
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return _SpanContext(name)
+
+
+def instrument(name):
+    """
+    Decorate a function or generator function so each call is recorded as a span
+
+    Generators are timed from the call to exhaustion. They do not become the
+    parent of spans opened while they are suspended, since their consumer may
+    resume them from another thread or context.
+
+    Args:
+        name (str): Span name
+    """
+    def decorate(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return (yield from fn(*args, **kwargs))
+                record = _Span(name)
+                parent = _current_span.get()
+                start = time.perf_counter()
+                try:
+                    return (yield from fn(*args, **kwargs))
+                except GeneratorExit:
+                    raise
+                except BaseException as e:
+                    record.error = type(e).__name__
+                    raise
+                finally:
+                    record.duration = time.perf_counter() - start
+                    _record(record, parent)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _SpanContext(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def increment(name, value=1, **labels):
+    """Add to a counter, exported as {METRIC_PREFIX}_{name} with the given labels."""
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def register_collector(collector):
+    """
+    Export metrics a module already keeps
+
+    Args:
+        collector (callable): Returns an iterable of (name, labels dict, value)
+            where value is a Histogram or a number (exported as a gauge)
+    """
+    with _lock:
+        _collectors.append(collector)
+
+
+def span_stats():
+    """Return count, mean and p50/p95/p99/max in seconds for every span name."""
+    with _lock:
+        histograms = dict(_span_histograms)
+    stats = {}
+    for name, histogram in sorted(histograms.items()):
+        snapshot = histogram.snapshot()
+        snapshot.pop("buckets")
+        snapshot["mean"] = snapshot["sum"] / snapshot["count"] if snapshot["count"] else 0.0
+        stats[name] = snapshot
+    return stats
+
+
+def recent_traces(limit=20, min_duration=0.0):
+    """
+    Return the most recent finished root spans with their nested children
+
+    Args:
+        limit (int): Maximum number of traces
+        min_duration (float): Skip traces faster than this many seconds
+
+    Returns:
+        list: Span dicts (name, duration, error, children), newest first
+    """
+    with _lock:
+        roots = list(_traces)
+    selected = [root for root in reversed(roots) if root.duration >= min_duration]
+    return [root.as_dict() for root in selected[:limit]]
+
+
+def reset():
+    """Drop every recorded span, counter and trace."""
+    with _lock:
+        _span_histograms.clear()
+        _counters.clear()
+        _traces.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def prometheus_text():
+    """Render every span, counter and collected metric in the Prometheus text exposition format."""
+    with _lock:
+        span_histograms = dict(_span_histograms)
+        counters = dict(_counters)
+        collectors = list(_collectors)
+
+    # metric name -> (type, [(labels, value)])
+    families = {}
+    for name, histogram in span_histograms.items():
+        families.setdefault("span_seconds", ("histogram", []))[1].append(((("span", name),), histogram))
+    for (name, labels), value in counters.items():
+        families.setdefault(name, ("counter", []))[1].append((labels, value))
+    for collector in collectors:
+        for name, labels, value in collector():
+            kind = "histogram" if isinstance(value, Histogram) else "gauge"
+            families.setdefault(name, (kind, []))[1].append((tuple(sorted(labels.items())), value))
+
+    lines = []
+    for name in sorted(families):
+        kind, samples = families[name]
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} {kind}")
+        for labels, value in samples:
+            if kind != "histogram":
+                lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            snapshot = value.snapshot()
+            for bound, count in snapshot["buckets"]:
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {snapshot['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _metrics_handler():
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return MetricsHandler
+
+
+def start_metrics_server(port=TELEMETRY_PORT, host="0.0.0.0"):
+    """
+    Serve /metrics from a background thread, once per process
+
+    Returns:
+        ThreadingHTTPServer: The server, or None if no port is configured
+    """
+    global _server
+    if not port:
+        return None
+    # http.server is only imported when a metrics port is configured
+    from http.server import ThreadingHTTPServer
+
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _metrics_handler())
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
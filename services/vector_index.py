@@ -0,0 +1,122 @@
+import numpy as np
+
+from services.embedding_cache import EMBEDDING_STORAGE_DTYPE, STORAGE_DTYPES
+
+
+class VectorIndex:
+    """
+    Fixed-capacity in-process index of unit vectors, searched by dot product
+
+    Vectors are normalized and kept in one contiguous matrix used as a ring
+    buffer: once full, a new vector overwrites the oldest. Deleted rows are
+    masked out until the ring reuses them. Not thread-safe; each
+    ConversationMemory owns one.
+
+    Args:
+        capacity (int): Maximum number of vectors
+        dtype (str): Storage dtype, "float32" or "float16"; scores are computed in float32
+    """
+
+    def __init__(self, capacity, dtype=EMBEDDING_STORAGE_DTYPE):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage dtype {dtype!r}, expected one of {', '.join(STORAGE_DTYPES)}")
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        # Allocated on the first add, once the dimension is known
+        self._matrix = None
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._ids = [None] * capacity
+        self._slots = {}
+        self._next = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, item_id):
+        return item_id in self._slots
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def add(self, item_id, vector):
+        """
+        Insert or replace a vector
+
+        Returns:
+            str: Id of the vector overwritten to make room, or None
+        """
+        vector = self._unit(vector)
+        if self._matrix is None:
+            self._matrix = np.zeros((self.capacity, vector.shape[0]), dtype=self.dtype)
+        elif vector.shape[0] != self._matrix.shape[1]:
+            raise ValueError(f"Index holds {self._matrix.shape[1]}-d vectors, not {vector.shape[0]}-d")
+
+        slot = self._slots.get(item_id)
+        if slot is not None:
+            self._matrix[slot] = vector
+            return None
+
+        # Fill holes left by deletes before overwriting a live vector
+        if len(self._slots) < self.capacity:
+            while self._ids[self._next] is not None:
+                self._next = (self._next + 1) % self.capacity
+        slot = self._next
+        evicted = self._ids[slot]
+        if evicted is not None:
+            del self._slots[evicted]
+
+        self._matrix[slot] = vector
+        self._valid[slot] = True
+        self._ids[slot] = item_id
+        self._slots[item_id] = slot
+        self._next = (slot + 1) % self.capacity
+        return evicted
+
+    def delete(self, item_ids):
+        """Remove vectors by id; unknown ids are ignored."""
+        for item_id in item_ids:
+            slot = self._slots.pop(item_id, None)
+            if slot is not None:
+                self._ids[slot] = None
+                self._valid[slot] = False
+
+    def clear(self):
+        """Remove every vector; the next add may use a different dimension."""
+        self._matrix = None
+        self._valid[:] = False
+        self._ids = [None] * self.capacity
+        self._slots.clear()
+        self._next = 0
+
+    def search(self, query, top_k):
+        """
+        Find the stored vectors most similar to a query
+
+        Args:
+            query (numpy.ndarray): Query vector, normalized here
+            top_k (int): Maximum number of results
+
+        Returns:
+            list: (id, cosine similarity) pairs, most similar first
+        """
+        k = min(top_k, len(self._slots))
+        if k <= 0:
+            return []
+        scores = self._matrix.astype(np.float32, copy=False) @ self._unit(query)
+        scores[~self._valid] = -np.inf
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self._ids[slot], float(scores[slot])) for slot in best]
+
+    @property
+    def dim(self):
+        """Dimension of the stored vectors, or None before the first add."""
+        return self._matrix.shape[1] if self._matrix is not None else None
+
+    @property
+    def nbytes(self):
+        """Bytes held by the vector matrix."""
+        return self._matrix.nbytes if self._matrix is not None else 0
@@ -1,22 +1,134 @@
-import pandas as pd
-import plotly.express as px
+import os
+from functools import lru_cache
+import numpy as np
 import streamlit as st
+from services import model_registry
 
-def estimate_trip_budget(destination, duration=7):
+COST_INDEX_PATH = os.getenv("COST_INDEX_PATH", "data/cost_indices.csv")
 
+# Per-day costs in USD for a standard-comfort trip to a city with index 1.0
+DAILY_COST_CATEGORIES = ('accommodation', 'food', 'local_transport', 'attractions')
+BASE_DAILY_COSTS = np.array([100.0, 50.0, 20.0, 30.0])
+MISCELLANEOUS_COST = 50.0
+
+# Per-category multipliers for each comfort tier, ordered from cheapest to most comfortable
+COMFORT_TIERS = {
+    'budget': (0.45, 0.60, 0.70, 0.60),
+    'standard': (1.00, 1.00, 1.00, 1.00),
+    'comfort': (1.80, 1.50, 1.60, 1.30),
+    'luxury': (3.50, 2.40, 3.00, 1.80),
+}
+DEFAULT_DURATIONS = tuple(range(1, 22))
+
+# plotly.express' Plasma_r sequence, inlined so the chart needs only plotly.graph_objects
+CHART_COLORS = ('#f0f921', '#fdca26', '#fb9f3a', '#ed7953', '#d8576b',
+                '#bd3786', '#9c179e', '#7201a8', '#46039f', '#0d0887')
+CHART_CACHE_SIZE = 64
+
+def load_cost_indices(path=COST_INDEX_PATH):
+    """
+    Return the shared per-city cost index table
+
+    Cities are indexed by lower-cased name; each daily category column is a
+    multiplier on BASE_DAILY_COSTS.
+    """
+    def load():
+        import pandas as pd
+
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=DAILY_COST_CATEGORIES, index=pd.Index([], name='city'), dtype=float)
+        indices = pd.read_csv(path, index_col='city')
+        indices.index = indices.index.str.casefold()
+        return indices
+
+    return model_registry.get_model(("cost_indices", path), load)
+
+def _city_key(destination):
+    # "Paris, France" and "  paris " both map to "paris"
+    return " ".join(destination.split(",")[0].split()).casefold()
+
+def budget_scenarios(destinations, durations=DEFAULT_DURATIONS, tiers=None, cost_indices=None):
+    """
+    Compute cost breakdowns for every destination × duration × comfort tier in one pass
+
+    Destinations missing from the cost index table are priced at index 1.0.
+
+    Args:
+        destinations (list): Destination names
+        durations (list): Trip lengths in days
+        tiers (list): Comfort tier names from COMFORT_TIERS (default: all)
+        cost_indices (pandas.DataFrame): Index table (default: load_cost_indices())
+
+    Returns:
+        pandas.DataFrame: One row per scenario with destination, duration, tier,
+            a column per cost category and total_estimated_budget
+    """
+    import pandas as pd
+
+    if cost_indices is None:
+        cost_indices = load_cost_indices()
+    tiers = list(tiers or COMFORT_TIERS)
+    destinations = list(destinations)
+    durations = np.asarray(durations, dtype=float)
+
+    # (destinations, categories), (tiers, categories)
+    city_index = (cost_indices.reindex([_city_key(d) for d in destinations])[list(DAILY_COST_CATEGORIES)]
+                  .fillna(1.0).to_numpy(dtype=float))
+    tier_index = np.array([COMFORT_TIERS[tier] for tier in tiers])
+
+    # Broadcast to (destinations, durations, tiers, categories)
+    daily = BASE_DAILY_COSTS * city_index[:, None, :] * tier_index[None, :, :]
+    costs = np.round(daily[:, None, :, :] * durations[None, :, None, None], 2)
+    costs = costs.reshape(-1, len(DAILY_COST_CATEGORIES))
+
+    shape = (len(destinations), len(durations), len(tiers))
+    d_idx, n_idx, t_idx = (axis.ravel() for axis in np.indices(shape))
+    scenarios = pd.DataFrame(costs, columns=DAILY_COST_CATEGORIES)
+    scenarios.insert(0, 'destination', np.array(destinations, dtype=object)[d_idx])
+    scenarios.insert(1, 'duration', durations.astype(int)[n_idx])
+    scenarios.insert(2, 'tier', pd.Categorical.from_codes(t_idx, categories=tiers, ordered=True))
+    scenarios['miscellaneous'] = MISCELLANEOUS_COST
+    scenarios['total_estimated_budget'] = costs.sum(axis=1) + MISCELLANEOUS_COST
+    return scenarios
+
+def scenarios_within_budget(budget, destinations, durations=DEFAULT_DURATIONS, tiers=None, cost_indices=None):
+    """
+    Return the scenarios whose total fits a budget
+
+    Args:
+        budget (float): Available budget in USD
+        destinations (list): Destination names
+        durations (list): Trip lengths in days
+        tiers (list): Comfort tier names (default: all)
+        cost_indices (pandas.DataFrame): Index table (default: load_cost_indices())
+
+    Returns:
+        pandas.DataFrame: Affordable scenarios, longest and most comfortable first
+    """
+    scenarios = budget_scenarios(destinations, durations, tiers, cost_indices)
+    fits = scenarios[scenarios['total_estimated_budget'] <= budget]
+    return fits.sort_values(['duration', 'tier', 'total_estimated_budget'],
+                            ascending=[False, False, True], ignore_index=True)
+
+def estimate_trip_budget(destination, duration=7, tier='standard'):
+    """
+    Estimate the cost of a trip
+
+    Args:
+        destination (str): Travel destination
+        duration (int): Trip length in days
+        tier (str): Comfort tier from COMFORT_TIERS
+
+    Returns:
+        dict: total_estimated_budget and a cost_breakdown per category
+    """
     try:
-        # Simulated budget estimation (would use more sophisticated API in production)
-        base_costs = {
-            'accommodation': 100 * duration,
-            'food': 50 * duration,
-            'local_transport': 20 * duration,
-            'attractions': 30 * duration,
-            'miscellaneous': 50
-        }
-        total_estimated_budget = sum(base_costs.values())
-        
+        scenario = budget_scenarios([destination], [duration], [tier]).iloc[0]
+        base_costs = {category: float(scenario[category])
+                      for category in DAILY_COST_CATEGORIES + ('miscellaneous',)}
+
         return {
-            'total_estimated_budget': total_estimated_budget,
+            'total_estimated_budget': float(scenario['total_estimated_budget']),
             'cost_breakdown': base_costs
         }
     except Exception as e:
@@ -26,22 +138,32 @@ def estimate_trip_budget(destination, duration=7):
 def generate_budget_visualization(budget_info):
     """
     Create a budget breakdown visualization
-    
+
+    Figures are cached on the breakdown values, so reruns with unchanged
+    inputs reuse the same figure.
+
     Args:
         budget_info (dict): Budget information dictionary
-    
+
     Returns:
         plotly figure: Budget breakdown pie chart
     """
     if not budget_info:
         return None
-    
-    df = pd.DataFrame.from_dict(budget_info['cost_breakdown'], orient='index', columns=['Cost'])
-    df.index.name = 'Category'
-    df = df.reset_index()
-    
-    fig = px.pie(df, values='Cost', names='Category', 
-                 title='Travel Budget Breakdown',
-                 color_discrete_sequence=px.colors.sequential.Plasma_r)
-    fig.update_traces(textposition='inside', textinfo='percent+label')
-    return fig
\ No newline at end of file
+
+    return _budget_figure(tuple(budget_info['cost_breakdown'].items()))
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def _budget_figure(breakdown):
+    # graph_objects directly: same chart as px.pie without the DataFrame round trip
+    import plotly.graph_objects as go
+
+    categories, costs = zip(*breakdown) if breakdown else ((), ())
+    fig = go.Figure(go.Pie(
+        labels=categories, values=costs,
+        textposition='inside', textinfo='percent+label',
+        hovertemplate='Category=%{label}<br>Cost=%{value}<extra></extra>'
+    ))
+    fig.update_layout(title_text='Travel Budget Breakdown', piecolorway=CHART_COLORS,
+                      legend_tracegroupgap=0)
+    return fig
@@ -1,33 +1,103 @@
+import hashlib
+import os
+import threading
 from fpdf import FPDF
+from services import telemetry
+from services.cache import TTLCache
 
-def generate_pdf(travel_plan, destination):
+FONT_FAMILY = "DejaVuSans"
+FONT_PATH = "data/DejaVuSans.ttf"
+
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", "64"))
+PDF_CACHE_TTL = 60 * 60
+
+_pdf_cache = TTLCache(max_size=PDF_CACHE_SIZE)
+
+# Font metrics captured from the first add_font call, reused by every later PDF
+_font_lock = threading.Lock()
+_font_template = None
+
+def _add_unicode_font(pdf):
     """
-    Generate a PDF travel plan
-    
-    Args:
-        travel_plan (str): Detailed travel plan text
-        destination (str): Travel destination
-    
-    Returns:
-        str: Path to generated PDF file
+    Register the DejaVuSans font on a PDF without reloading its metrics
+
+    fpdf's add_font unpickles the metrics file on every call. The first call
+    is done once on a probe document; later documents get copies of its font
+    entries, with fresh per-document state (glyph subset, object numbers).
     """
+    global _font_template
+    fontkey = FONT_FAMILY.lower()
+
+    with _font_lock:
+        if _font_template is None:
+            probe = FPDF()
+            probe.add_font(FONT_FAMILY, "", FONT_PATH, uni=True)
+            _font_template = (probe.fonts[fontkey], probe.font_files)
+
+    font, font_files = _font_template
+    pdf.fonts[fontkey] = {**font, "i": len(pdf.fonts) + 1, "subset": list(font["subset"])}
+    for name, entry in font_files.items():
+        pdf.font_files[name] = dict(entry)
+
+@telemetry.instrument("pdf.render")
+def _render(travel_plan, destination):
     pdf = FPDF()
     pdf.add_page()
-    
+
     # Add a font that supports Unicode (DejaVuSans or other)
-    pdf.add_font("DejaVuSans", "", "data/DejaVuSans.ttf", uni=True)
-    pdf.set_font("DejaVuSans", size=12)
-    
+    _add_unicode_font(pdf)
+    pdf.set_font(FONT_FAMILY, size=12)
+
     pdf.cell(200, 10, txt=f"Travel Plan for {destination}", ln=True, align="C")
     pdf.ln(10)
-    
+
     # Use multi_cell to handle long text and preserve line breaks
     pdf.multi_cell(0, 10, travel_plan)
-    
-    # Create PDF file path
-    pdf_file_path = f"data/{destination}_travel_plan.pdf"
-    
+
+    # fpdf 1.7 keeps the document as a latin-1 string
+    return pdf.output(dest="S").encode("latin-1")
+
+def _cache_key(travel_plan, destination):
+    return hashlib.sha256(f"{destination}\0{travel_plan}".encode("utf-8")).hexdigest()
+
+@telemetry.instrument("pdf.generate")
+def generate_pdf_bytes(travel_plan, destination):
+    """
+    Render a PDF travel plan in memory
+
+    Identical plans are served from a content-hash cache.
+
+    Args:
+        travel_plan (str): Detailed travel plan text
+        destination (str): Travel destination
+
+    Returns:
+        bytes: PDF document
+    """
+    key = _cache_key(travel_plan, destination)
+    hit, pdf_bytes = _pdf_cache.get(key)
+    if not hit:
+        pdf_bytes = _render(travel_plan, destination)
+        _pdf_cache.set(key, pdf_bytes, PDF_CACHE_TTL)
+    return pdf_bytes
+
+def generate_pdf(travel_plan, destination):
+    """
+    Generate a PDF travel plan
+
+    Args:
+        travel_plan (str): Detailed travel plan text
+        destination (str): Travel destination
+
+    Returns:
+        str: Path to generated PDF file
+    """
+    # The content hash keeps concurrent plans for the same city from overwriting each other
+    digest = _cache_key(travel_plan, destination)[:12]
+    pdf_file_path = f"data/{destination}_travel_plan_{digest}.pdf"
+
     # Output PDF to file
-    pdf.output(pdf_file_path)
-    
-    return pdf_file_path
\ No newline at end of file
+    with open(pdf_file_path, "wb") as f:
+        f.write(generate_pdf_bytes(travel_plan, destination))
+
+    return pdf_file_path
@@ -0,0 +1,67 @@
+import re
+import uuid
+import streamlit as st
+import streamlit.components.v1 as components
+from services import model_registry
+from services.nlp_services import ConversationMemory, CONVERSATION_MEMORY_DIR
+from services.nlp_pool import NLP_WORKERS
+
+# Cookie holding the session id across reloads
+SESSION_COOKIE = "voyager_session"
+SESSION_COOKIE_MAX_AGE = 30 * 24 * 60 * 60
+_SESSION_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+def _remember_session_cookie(session_id):
+    # Streamlit can read cookies but not set them; a zero-height script does it.
+    # Component iframes share the app's origin, so the cookie is the app's.
+    components.html(
+        f"<script>document.cookie = '{SESSION_COOKIE}={session_id}; path=/; "
+        f"max-age={SESSION_COOKIE_MAX_AGE}; SameSite=Strict' + "
+        f"(location.protocol === 'https:' ? '; Secure' : '');</script>",
+        height=0,
+    )
+
+def get_session_id():
+    """
+    Return a stable identifier for the current browser session
+
+    The id is kept in a first-party cookie, not the page URL, so a reload
+    resumes the same conversation memory when a persistent store is
+    configured without exposing the id in links, history or referrers.
+    """
+    if "session_id" not in st.session_state:
+        # Drop ids left in the URL by older versions rather than adopting them
+        if "session" in st.query_params:
+            del st.query_params["session"]
+        session_id = st.context.cookies.get(SESSION_COOKIE, "")
+        if not _SESSION_ID_RE.fullmatch(session_id):
+            session_id = uuid.uuid4().hex
+            _remember_session_cookie(session_id)
+        st.session_state.session_id = session_id
+    return st.session_state.session_id
+
+def get_conversation_memory():
+    """
+    Return this session's ConversationMemory, creating it on first use
+
+    Returns:
+        ConversationMemory: Memory scoped to the current session
+    """
+    if "conversation_memory" not in st.session_state:
+        st.session_state.conversation_memory = ConversationMemory(session_id=get_session_id())
+    return st.session_state.conversation_memory
+
+def conversation_memory_ready():
+    """
+    Return True if get_conversation_memory() can return without waiting for model loading
+
+    Pages use this to render while the embedding model and Chroma are still
+    warming up in the background.
+    """
+    if "conversation_memory" in st.session_state:
+        return True
+    required = {("chroma", CONVERSATION_MEMORY_DIR)}
+    # With worker processes the embedding model is loaded there, not here
+    if not NLP_WORKERS:
+        required.add(model_registry.sentence_transformer_key())
+    return required <= set(model_registry.loaded_models())